@@ -21,11 +21,20 @@ boosting algorithms using confidence-rated predictions.
 import random
 import math
 import copy
+import numpy
 
 # Local imports
 from utils.settings import *
+from utils.utils import ties
 from core.itemset import Itemset
 from core.partitionclassifier import PartitionClassifier
+from core.dataset import dataset_of
+from core.supportindex import index_of
+from core.weightedsupport import WeightedSupport
+
+# Confidence functions of the vectorized engine
+# margin: 2p - 1 (cboost), ratio: p (cboost2), static: unweighted p (cboost3)
+CONFIDENCES = ["margin", "ratio", "static"]
 
 # Confidence-rated boosting algorithm
 def cboost(itemsets, train, classes, rounds):
@@ -350,4 +359,129 @@ def cboost3(itemsets, train, classes, rounds):
 		# Adding classifier to the final model
 		model.append((copy.copy(h), alpha))
 
-	return model
\ No newline at end of file
+	return model
+
+# Confidence-rated boosting algorithm, vectorized over a support index
+# The confidence function selects the variant: cboost, cboost2 or cboost3
+# Same model as the variant for the same seed, unless rules tie up to
+# rounding (see utils.ties)
+def vcboost(itemsets, train, classes, rounds, confidence="margin"):
+	if confidence not in CONFIDENCES: raise ValueError("Unknown confidence function: " + str(confidence))
+
+	# Safety
+	if len(itemsets) == 0 or len(train) == 0:
+		return []
+
+	# Setting seed
+	random.seed(RANDOM_SEED)
+
+	# Support index
+	dataset = dataset_of(train, classes)
+	index = index_of(itemsets, dataset)
+	codes = dataset.codes
+	K = len(dataset.classes)
+
+	# Class columns in the order the dict-based loops break ties among them
+	order = numpy.array([dataset.classes.index(class_) for class_ in {class_: None for class_ in classes}])
+	rows = numpy.arange(len(itemsets))
+
+	# Variables
+	model = []
+
+	#
+	default = PartitionClassifier(Itemset(-1, set(), {}, default=True))
+
+	# Static predictions: from the unweighted supports
+	if confidence == "static":
+		insizes = index.sizes().astype(float)
+		outsizes = numpy.bincount(codes, minlength=K) - insizes
+
+		spred = order[numpy.argmax(insizes[:, order], axis=1)]
+		aux = insizes.sum(axis=1)
+		sconf = numpy.where(aux == 0, 0, insizes[rows, spred] / numpy.where(aux == 0, 1, aux))
+
+		spred_ = order[numpy.argmax(outsizes[:, order], axis=1)]
+		aux = outsizes.sum(axis=1)
+		sconf_ = numpy.where(aux == 0, 0, outsizes[rows, spred] / numpy.where(aux == 0, 1, aux)) # As cboost3
+
+	# First weights
+	weights = numpy.repeat(1 / float(len(dataset)), len(dataset))
+
+	# Lazily normalized weighted supports
+	support = WeightedSupport(index, weights)
+
+	# Boosting iterations
+	for t in range(rounds):
+		# Normalization
+		support.normalize()
+		wsum = support.totals()
+
+		# Supports
+		inweights = support.candidates()[1]
+		outweights = numpy.maximum(0, wsum - inweights)
+
+		insum = inweights.sum(axis=1)
+		outsum = outweights.sum(axis=1)
+
+		if confidence == "static":
+			pred, conf, pred_, conf_ = spred, sconf, spred_, sconf_
+		else:
+			# The weightest classes within and outside the support
+			pred = order[numpy.argmax(inweights[:, order], axis=1)]
+			pred_ = order[numpy.argmax(outweights[:, order], axis=1)]
+
+			conf = inweights[rows, pred] / numpy.where(insum == 0, 1, insum)
+			conf_ = outweights[rows, pred_] / numpy.where(outsum == 0, 1, outsum)
+
+			if confidence == "margin":
+				conf = (conf - 0.5) / 0.5
+				conf_ = (conf_ - 0.5) / 0.5
+
+			# Safety
+			conf[insum == 0] = 0
+			conf_[outsum == 0] = 0
+
+		z = (2 * inweights[rows, pred] - insum) * conf + \
+			(2 * outweights[rows, pred_] - outsum) * conf_
+
+		# Maximizing z
+		Z = z.max()
+		if Z > 0:
+			chosen = ties(z, Z)
+		else:
+			chosen = ties(z, 0.0)
+
+			# The dict-based loops always keep the first itemset (but cboost2)
+			if confidence != "ratio" and z[0] < 0: chosen.insert(0, 0)
+
+		# No good rule was chosen
+		if len(chosen) == 0:
+			if len(model) == 0: # And model is empty
+				model.append((default, 1.0))
+
+			return model
+
+		# Randomly choose the best itemset
+		r = chosen[random.randint(0, len(chosen) - 1)]
+		h = PartitionClassifier(itemsets[r],
+			dataset.classes[pred[r]], float(conf[r]), dataset.classes[pred_[r]], float(conf_[r]))
+
+		# Calculating alpha
+		z = float(z[r])
+		alpha = math.log((1 + z) / (1 - z)) / 2
+
+		# Updating train weights using h_t: factors outside and inside the support
+		outside = numpy.array([math.exp((-1 if class_ == h.pred_ else 1) * h.conf_ * alpha) for class_ in dataset.classes])
+		inside = numpy.array([math.exp((-1 if class_ == h.pred else 1) * h.conf * alpha) for class_ in dataset.classes])
+
+		# Whole classes are scaled and only the support is touched
+		if h.itemset.isdefault(): support.scale(inside)
+		else:
+			ids = index.row(r)
+			support.scale(outside)
+			support.multiply((inside / outside)[codes[ids]], ids)
+
+		# Adding classifier to the final model
+		model.append((copy.copy(h), alpha))
+
+	return model
@@ -19,11 +19,16 @@ learnability.
 # Imports
 import random
 import math
+import numpy
 
 # Local imports
 from utils.settings import *
+from utils.utils import ties
 from core.itemset import Itemset
 from core.ruleclassifier import RuleClassifier
+from core.dataset import dataset_of
+from core.supportindex import index_of
+from core.weightedsupport import WeightedSupport
 import utils.metrics as metrics
 
 # Discrete Boosting algorithm
@@ -130,4 +135,91 @@ def dboost(itemsets, train, classes, rounds):
 		# Adding classifier to the final model
 		model.append((h, alpha))
 
-	return model
\ No newline at end of file
+	return model
+
+# Discrete Boosting algorithm, vectorized over a support index
+# Same model as dboost() for the same seed, unless rules tie up to
+# rounding (see utils.ties). Every row is evaluated: the bound of a row's error (its largest class
+# weight past the smallest class sum) costs about as much as the error
+# and prunes next to no row, so there is no bounded search
+def vdboost(itemsets, train, classes, rounds):
+	# Safety
+	if len(itemsets) == 0 or len(train) == 0:
+		return []
+
+	# Setting seed
+	random.seed(RANDOM_SEED)
+
+	# Support index
+	dataset = dataset_of(train, classes)
+	index = index_of(itemsets, dataset)
+	codes = dataset.codes
+	K = len(dataset.classes)
+
+	# Twin classes in the order dboost() breaks ties among them
+	twins = [class_ for class_ in {classes[0]: None, classes[1]: None}]
+	first, second = [dataset.classes.index(class_) for class_ in twins]
+	defaults = numpy.array([it.isdefault() for it in itemsets])
+
+	# Variables
+	model = []
+
+	#
+	default = RuleClassifier(Itemset(-1, set(), {}, default=True))
+
+	# First weights
+	weights = numpy.repeat(1 / float(len(dataset)), len(dataset))
+
+	# Lazily normalized weighted supports
+	support = WeightedSupport(index, weights)
+
+	# Objective of rows: minus the projection error of their best twin rule
+	def score(rows, wsupp):
+		error_1 = wsum[first] - wsupp[:, first] + wsupp[:, second]
+		error_2 = wsum[second] - wsupp[:, second] + wsupp[:, first]
+
+		return -numpy.minimum(error_1, error_2), numpy.where(error_2 < error_1, second, first)
+
+	# Boosting iterations
+	for t in range(rounds):
+		# Normalization
+		support.normalize()
+		wsum = support.totals()
+
+		# Candidate itemsets
+		rows, wsupp = support.candidates()
+		merit, twin = score(rows, wsupp)
+		minerror = -merit.max()
+
+		# No good itemset was chosen
+		if minerror >= (0.5 - GAMMA) or minerror <= 0:
+			if len(model) == 0:
+				model.append((default, 1.0))
+
+			return model
+
+		# Randomly chose the best itemset
+		c = random.sample(ties(merit, -minerror), 1)[0]
+		r = rows[c]
+		h = RuleClassifier(itemsets[r], dataset.classes[twin[c]], 1.0)
+
+		# Calculating alpha
+		minerror = float(minerror)
+		alpha = math.log((1.0 - minerror) / minerror) / 2
+
+		# Updating train weights: misclassified when inside XOR same class
+		same = numpy.arange(K) == twin[c]
+		outside = numpy.where(same, math.exp(alpha), math.exp(-alpha))
+		inside = numpy.where(same, math.exp(-alpha), math.exp(alpha))
+
+		# Whole classes are scaled and only the support is touched
+		if defaults[r]: support.scale(inside)
+		else:
+			ids = index.row(r)
+			support.scale(outside)
+			support.multiply((inside / outside)[codes[ids]], ids)
+
+		# Adding classifier to the final model
+		model.append((h, alpha))
+
+	return model
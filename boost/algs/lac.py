@@ -19,6 +19,7 @@ associative classification. Spring, 2011.
 # Imports
 import utils.metrics as metrics
 from core.ruleclassifier import RuleClassifier
+from core.compiledlac import CompiledLAC
 
 # Lazy Associative Classification
 def lac(itemsets, classes):
@@ -31,3 +32,7 @@ def lac(itemsets, classes):
 			model.append((RuleClassifier(it, class_, conf[class_]), 1.0))
 		
 	return model
+
+# Lazy Associative Classification: compiled for batch prediction
+def clac(itemsets, classes):
+	return CompiledLAC(lac(itemsets, classes))
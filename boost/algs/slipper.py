@@ -21,11 +21,18 @@ fast, and effective rule learner
 import random
 import math
 import copy
+import numpy
 
 # Local imports
 from utils.settings import *
 from core.itemset import Itemset
 from core.ruleclassifier import RuleClassifier
+from core.dataset import dataset_of
+from core.supportindex import index_of
+from core.weightedsupport import WeightedSupport
+from core.candidatesearch import CandidateSearch
+from utils.utils import ties
+from utils import parallel
 
 # SLIPPER: Multiclass
 def slipper(itemsets, train, classes, rounds, weights=None, extra=None):
@@ -141,4 +148,138 @@ def slipper(itemsets, train, classes, rounds, weights=None, extra=None):
 	weights.clear()
 	# print ""
 
-	return model
\ No newline at end of file
+	return model
+
+# SLIPPER: Multiclass, vectorized over a support index
+# Same model as slipper() for the same seed, unless rules tie up to
+# rounding (see utils.ties). The weighted supports are cached and only
+# the rows covering reweighted instances are updated.
+# With bnb, only the rows whose bound may reach the round's best are
+# scored (see CandidateSearch; stats gets the number of skipped and
+# evaluated candidates)
+def vslipper(itemsets, train, classes, rounds, weights=None, extra=None, bnb=False, stats=None, index=None):
+	# Safety
+	if len(itemsets) == 0 or len(train) == 0:
+		return []
+	elif len(classes) == 1:
+		return [(RuleClassifier(Itemset(-1, None, None, default=True), classes[0], 1.0),1.0)]
+	elif len(classes) == 0:
+		return [(RuleClassifier(Itemset(-1, None, None, default=True), None, 1.0),1.0)]
+
+	# Setting seed
+	random.seed(RANDOM_SEED)
+
+	# Support index (unless shared by the caller)
+	dataset = dataset_of(train, classes)
+	if index is None: index = index_of(itemsets, dataset)
+	codes = dataset.codes
+	K = len(dataset.classes)
+
+	# Class columns in the order slipper() breaks ties among them
+	order = numpy.array([dataset.classes.index(class_) for class_ in {class_: None for class_ in classes}])
+	defaults = numpy.array([it.isdefault() for it in itemsets])
+
+	# Variables
+	model = []
+	smooth = 1.0 / (2.0 * len(dataset))
+
+	# Initializing weights
+	if weights is None: weights = numpy.repeat(1.0/len(dataset), len(dataset))
+	else: weights = dataset.array(weights)
+
+	# Extra weight
+	if extra is None: extra = {class_: 0 for class_ in classes}
+	extra = numpy.array([extra[class_] for class_ in dataset.classes], dtype=float)
+
+	# Lazily normalized weighted supports: every row or the bounded ones scored
+	if bnb: support = CandidateSearch(index, weights, extra, numpy.flatnonzero(defaults))
+	else: support = WeightedSupport(index, weights, extra)
+
+	# Objective of rows: g of their two weightest classes
+	def score(rows, cover):
+		cover = numpy.maximum(0, cover)
+		isdefault = defaults[rows]
+		if isdefault.any():
+			cover[isdefault] = support.totals()
+
+		ranks = order[numpy.argsort(-cover[:, order], axis=1, kind='mergesort')]
+		pos, neg = ranks[:, 0], ranks[:, 1]
+		at = numpy.arange(len(rows))
+
+		return numpy.sqrt(cover[at, pos]) - numpy.sqrt(cover[at, neg]), cover, pos, neg
+
+	# Boosting iterations
+	for t in xrange(rounds):
+		# Normalization (safety: no weight left)
+		if not support.normalize(): break
+
+		# Candidate itemsets: g is at most the square root of the largest class weight
+		rows, cover = support.candidates(lambda rows, cover: score(rows, cover)[0], numpy.sqrt)
+		g, cover, pos, neg = score(rows, cover)
+
+		# Search statistics
+		if bnb and stats is not None: stats.update(skipped=support.skipped, evaluated=support.evaluated)
+
+		# Maximizing G
+		chosen = ties(g, g.max())
+
+		# No good rule was chosen
+		if len(chosen) == 0: break
+
+		# Randomly chose the best itemset
+		c = random.sample(chosen, 1)[0]
+		r = rows[c]
+		wpos, wneg = float(cover[c, pos[c]]), float(cover[c, neg[c]])
+		pos, neg = dataset.classes[pos[c]], dataset.classes[neg[c]]
+		conf = math.log((wpos + smooth) / (wneg + smooth)) / 2.0
+
+		# Building classifier
+		h = RuleClassifier(itemsets[r], (neg if conf < 0 else pos if conf > 0 else None), abs(conf))
+
+		# Factor of each class
+		right, wrong = math.exp(-h.conf), math.exp(h.conf)
+		factors = numpy.array([(right if class_ == h.pred else wrong) for class_ in dataset.classes])
+
+		# Updating weights: Default classifier
+		if h.itemset.isdefault():
+			support.scale(factors)
+
+		# Updating weights: Non-default classifier
+		else:
+			ids = index.row(r)
+			support.multiply(factors[codes[ids]], ids)
+
+		# Adding classifier to the final model
+		model.append((h, 1.0))
+
+	return model
+
+# SLIPPER: several (weights, extra) variants at once
+# The dataset and the support index are built once and the variants are
+# trained in a process pool. Models are returned in the variants' order
+def vslippers(itemsets, train, classes, rounds, variants, bnb=False, stats=None):
+	# Shared precomputations (inherited by the workers)
+	dataset = dataset_of(train, classes)
+	index = index_of(itemsets, dataset) if len(itemsets) > 0 else None
+	if index is not None: index.inverted()
+
+	# Rules travel back with itemset positions (itemsets are not pickled)
+	positions = {id(it): k for k, it in enumerate(itemsets)}
+
+	def variant(weights, extra):
+		stats_ = {}
+		model = vslipper(itemsets, dataset, classes, rounds, weights, extra, bnb, stats_, index)
+		rules = [(positions.get(id(h.itemset), h.itemset), h.pred, h.conf, alpha) for h, alpha in model]
+
+		return rules, stats_
+
+	# Rebuilding the models
+	models = []
+	for rules, stats_ in parallel.pmap(variant, variants):
+		models.append([(RuleClassifier(itemsets[k] if isinstance(k, int) else k, pred, conf), alpha)
+			for k, pred, conf, alpha in rules])
+
+		# Statistics of the first variant
+		if stats is not None and len(models) == 1: stats.update(stats_)
+
+	return models
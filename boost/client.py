@@ -0,0 +1,48 @@
+#!/usr/bin/python
+
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+'''
+
+Description
+-----------
+Client of the resident server (main.py --serve SOCKET). It takes the
+same arguments as the main module and prints the same output:
+
+  client.py SOCKET -s ... -t ... -i /dev/stdin -ZAS
+
+The standard input is sent along when /dev/stdin (or -) is an argument
+
+'''
+
+# Imports
+import sys
+import json
+import socket
+
+# MAIN
+if __name__ == "__main__":
+	if len(sys.argv) < 2:
+		sys.stderr.write("Usage: %s SOCKET [main.py arguments]\n" % sys.argv[0])
+		sys.exit(1)
+
+	path, argv = sys.argv[1], sys.argv[2:]
+	request = {"args": argv}
+	if "/dev/stdin" in argv or "-" in argv: request["input"] = sys.stdin.read().decode("latin-1") # Byte-transparent
+
+	# One request per connection
+	connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	connection.connect(path)
+	connection.sendall(json.dumps(request) + "\n")
+
+	handler = connection.makefile("r")
+	response = json.loads(handler.readline())
+	connection.close()
+
+	if not response["ok"]:
+		sys.stderr.write(response["error"] + "\n")
+		sys.exit(1)
+
+	sys.stdout.write(response["output"])
@@ -19,3 +19,7 @@ class AbstractClassifier(object):
 	@abstractmethod
 	def classify(self, X):
 		pass
+
+	# Outcomes (class, conf) inside and outside the itemset's coverage
+	def outcomes(self):
+		return (self.pred, self.conf), (None, 0)
@@ -0,0 +1,48 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+import numpy
+
+from weightedsupport import WeightedSupport
+from utils.settings import TIE_TOLERANCE
+
+''' Class CandidateSearch '''
+
+# Bounded search over the rows of a support index, on the weighted
+# supports kept by WeightedSupport. The largest class weight of each row
+# bounds its objective: the rows evaluated always and the row of the
+# largest bound give a first best objective, and only the rows whose
+# bound can reach (or tie) it are evaluated, at once
+class CandidateSearch(WeightedSupport):
+
+	#
+	def __init__(self, index, weights, extra=None, always=[]):
+		super(CandidateSearch, self).__init__(index, weights, extra)
+
+		self.always = numpy.array(always, dtype=numpy.intp) # Rows evaluated every round
+
+		# Statistics
+		self.skipped = 0
+		self.evaluated = 0
+
+	# Rows that may hold the best objective and their weighted supports
+	# evaluate(rows, cover) gives the objective of rows (to be maximized)
+	# limit(m) bounds the objective of rows whose class weights are <= m
+	def candidates(self, evaluate, limit):
+		cover = self.cover * self.scales()
+
+		bounds = limit(cover.max(axis=1))
+		bounds[self.always] = numpy.inf
+
+		# First best: the rows evaluated always and the largest bound's
+		first = numpy.union1d(self.always, [numpy.argmax(bounds)])
+		best = evaluate(first, cover[first]).max()
+
+		# Rows that may reach it (in itemset order)
+		rows = numpy.flatnonzero(bounds >= best - TIE_TOLERANCE * abs(best))
+
+		self.evaluated += len(rows)
+		self.skipped += len(self.index) - len(rows)
+
+		return rows, cover[rows]
@@ -0,0 +1,119 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+import numpy
+
+''' Class CompiledLAC '''
+
+# LAC model (one rule per itemset per class) compiled for prediction.
+# Each itemset's coverage is evaluated once per instance: the patterns
+# covering an instance are found through a feature -> pattern inverted
+# index by counting the instance's features in each of them
+class CompiledLAC(object):
+
+	#
+	def __init__(self, model):
+		self.model = model # The (h, alpha) list
+
+		# Itemsets and rules (in model order)
+		self.itemsets = []
+		self.classes = []
+		position = {}
+		owners, codes, values = [], [], []
+
+		for h, alpha in model:
+			if h.pred is None: continue # Never votes
+
+			if id(h.itemset) not in position:
+				position[id(h.itemset)] = len(self.itemsets)
+				self.itemsets.append(h.itemset)
+
+			if h.pred not in self.classes: self.classes.append(h.pred)
+
+			owners.append(position[id(h.itemset)])
+			codes.append(self.classes.index(h.pred))
+			values.append(h.conf * alpha)
+
+		self.codes = numpy.array(codes, dtype=numpy.intp)
+		self.values = numpy.array(values, dtype=float)
+
+		# Rules of each itemset: rules[ruleptr[k]:ruleptr[k+1]]
+		self.rules = numpy.argsort(owners, kind='mergesort')
+		self.ruleptr = numpy.zeros(len(self.itemsets) + 1, dtype=numpy.intp)
+		numpy.cumsum(numpy.bincount(owners, minlength=len(self.itemsets)), out=self.ruleptr[1:])
+
+		# Patterns: owner itemsets, lengths and inverted index
+		self.always = [] # Itemsets covering every instance
+		patterns, lengths, inverted = [], [], {}
+
+		for k, it in enumerate(self.itemsets):
+			if it.isdefault() or any(len(pattern) == 0 for pattern in it.patterns):
+				self.always.append(k)
+				continue
+
+			for pattern in it.patterns:
+				for f in pattern: inverted.setdefault(f, []).append(len(patterns))
+
+				patterns.append(k)
+				lengths.append(len(pattern))
+
+		self.patterns = numpy.array(patterns, dtype=numpy.intp)
+		self.lengths = numpy.array(lengths, dtype=numpy.intp)
+		self.inverted = {f: numpy.array(p, dtype=numpy.intp) for f, p in inverted.iteritems()}
+
+		# Score dict orders per class insertion sequence
+		self.orders = {}
+
+	#
+	def __len__(self):
+		return len(self.model)
+
+	# Itemsets covering an instance (positions)
+	def covering(self, features):
+		lists = [self.inverted[f] for f in features if f in self.inverted]
+		covered = []
+
+		if len(lists) > 0:
+			counts = numpy.bincount(numpy.concatenate(lists), minlength=len(self.patterns))
+			covered = self.patterns[counts == self.lengths]
+
+		return numpy.union1d(covered, self.always).astype(numpy.intp)
+
+	# Final predictions of the model (see utils.prediction), None replaced by default
+	def predictions(self, tests, default=None, average=False):
+		labels = numpy.array([default] + self.classes)
+		codes = numpy.zeros((len(tests), 1), dtype=int)
+
+		for i, inst in enumerate(tests):
+			itemsets = self.covering(inst.features)
+			if len(itemsets) == 0: continue
+
+			# Covering rules in model order
+			rules = numpy.sort(numpy.concatenate([self.rules[self.ruleptr[k]:self.ruleptr[k + 1]] for k in itemsets]))
+			if len(rules) == 0: continue
+
+			# Scores summed in model order
+			classes = self.codes[rules]
+			score = numpy.bincount(classes, weights=self.values[rules], minlength=len(self.classes))
+			count = numpy.bincount(classes, minlength=len(self.classes))
+			if average: score = score / numpy.where(count == 0, 1, count)
+
+			# Dict order: classes in their insertion order
+			present, first = numpy.unique(classes, return_index=True)
+			order = self.order(tuple(present[numpy.argsort(first)]), average)
+
+			best = score[present].max()
+			codes[i, 0] = 1 + next(k for k in order if score[k] == best)
+
+		return labels[codes]
+
+	# Iteration order of the score dict (avgscr's if average)
+	def order(self, sequence, average):
+		if (sequence, average) not in self.orders:
+			keys = list({self.classes[k]: None for k in sequence})
+			if average: keys = list({class_: None for class_ in keys})
+
+			self.orders[(sequence, average)] = [self.classes.index(class_) for class_ in keys]
+
+		return self.orders[(sequence, average)]
@@ -0,0 +1,153 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+import numpy
+
+from instance import Instance
+
+''' Class FeatureCoverage '''
+
+# Instances covered by itemsets, from the instances' features. An
+# itemset covers an instance when any of its patterns is a subset of
+# the instance's features (see Itemset.issubset)
+class FeatureCoverage(object):
+
+	# Cached masks are dropped past this number of bytes
+	CACHE = 1 << 27
+
+	#
+	def __init__(self, instances):
+		self.n = len(instances)
+
+		# Inverted lists: feature -> positions of the instances having it
+		inverted = {}
+		for p, inst in enumerate(instances):
+			for f in inst.features: inverted.setdefault(f, []).append(p)
+
+		self.inverted = {f: numpy.array(positions, dtype=numpy.intp) for f, positions in inverted.iteritems()}
+		self.cache = {}
+
+	# Coverage mask of an itemset
+	def __call__(self, itemset):
+		if itemset.isdefault(): return numpy.ones(self.n, dtype=bool)
+
+		key = id(itemset)
+		if key not in self.cache:
+			if len(self.cache) * self.n > self.CACHE: self.cache.clear()
+
+			mask = numpy.zeros(self.n, dtype=bool)
+			for pattern in itemset.patterns: mask |= self.pattern(pattern)
+
+			self.cache[key] = (itemset, mask) # Keeping the itemset alive keeps its id
+
+		return self.cache[key][1]
+
+	# Coverage mask of a pattern: instances having all its features
+	def pattern(self, pattern):
+		if len(pattern) == 0: return numpy.ones(self.n, dtype=bool)
+
+		lists = [self.inverted.get(f) for f in pattern]
+		if any(positions is None for positions in lists): return numpy.zeros(self.n, dtype=bool)
+
+		return numpy.bincount(numpy.concatenate(lists), minlength=self.n) == len(pattern)
+
+''' Class BitmapCoverage '''
+
+# Instances covered by the itemsets of compiled models. Patterns and
+# instances are packed into 64-bit words over the models' features, and
+# a pattern covers an instance when (instance & pattern) == pattern. The
+# coverage of every itemset over every instance is computed upfront
+class BitmapCoverage(object):
+
+	# Elements per vectorized block (patterns x instances x words)
+	CHUNK = 1 << 23
+
+	#
+	def __init__(self, itemsets, instances):
+		self.n = len(instances)
+
+		# Itemsets (default ones cover everything)
+		self.position = {}
+		self.itemsets = []
+		for it in itemsets:
+			if not it.isdefault() and id(it) not in self.position:
+				self.position[id(it)] = len(self.itemsets)
+				self.itemsets.append(it)
+
+		# Feature bits
+		features = set(f for it in self.itemsets for pattern in it.patterns for f in pattern)
+		self.bit = {f: b for b, f in enumerate(sorted(features))}
+		self.words = max(1, (len(self.bit) + 63) // 64)
+
+		# Packed patterns (grouped by itemset) and instances
+		patterns = [pattern for it in self.itemsets for pattern in it.patterns]
+		self.starts = numpy.cumsum([0] + [len(it.patterns) for it in self.itemsets])[:-1]
+		self.patterns = self.pack(patterns)
+		self.instances = self.pack([inst.features for inst in instances])
+		self.features = [inst.features for inst in instances]
+
+		# Coverage: (itemsets x instances)
+		self.coverage = numpy.zeros((len(self.itemsets), self.n), dtype=bool)
+		if len(patterns) > 0 and self.n > 0: self.compute()
+
+	# Packed bitmaps of feature sets (unknown features are left out)
+	def pack(self, sets):
+		bits = [(r, self.bit[f]) for r, features in enumerate(sets) for f in features if f in self.bit]
+		packed = numpy.zeros((len(sets), self.words), dtype=numpy.uint64)
+
+		if len(bits) > 0:
+			rows, bits = numpy.array(bits, dtype=numpy.int64).T
+			numpy.bitwise_or.at(packed, (rows, bits >> 6), numpy.left_shift(numpy.uint64(1), (bits & 63).astype(numpy.uint64)))
+
+		return packed
+
+	# Coverage of every itemset, a block of patterns at a time
+	def compute(self):
+		covered = numpy.zeros((len(self.patterns), self.n), dtype=numpy.uint8)
+		step = max(1, self.CHUNK // (self.n * self.words))
+
+		for p in xrange(0, len(self.patterns), step):
+			block = self.patterns[p:p + step, None, :]
+			covered[p:p + step] = ((self.instances[None, :, :] & block) == block).all(axis=2)
+
+		# An itemset covers an instance when any of its patterns does
+		self.coverage[:] = numpy.maximum.reduceat(covered, self.starts, axis=0)
+
+	# Coverage mask of an itemset
+	def __call__(self, itemset):
+		if itemset.isdefault(): return numpy.ones(self.n, dtype=bool)
+
+		# Itemsets out of the compiled models: subset tests
+		if id(itemset) not in self.position:
+			return numpy.array([itemset.issubset(features) for features in self.features], dtype=bool)
+
+		return self.coverage[self.position[id(itemset)]]
+
+''' Class SupportCoverage '''
+
+# Training instances (keys) covered by itemsets, from their supports
+class SupportCoverage(object):
+
+	#
+	def __init__(self, keys):
+		self.n = len(keys)
+		self.positions = {key: p for p, key in enumerate(keys)}
+
+	# Coverage mask of an itemset
+	def __call__(self, itemset):
+		mask = numpy.zeros(self.n, dtype=bool)
+		if itemset.isdefault():
+			mask[:] = True
+			return mask
+
+		for class_ in itemset.supp:
+			positions = [self.positions[i] for i in itemset.supp[class_] if i in self.positions]
+			mask[positions] = True
+
+		return mask
+
+# Coverage of a list of test instances or training keys
+def coverage_of(tests):
+	if len(tests) > 0 and isinstance(tests[0], Instance): return FeatureCoverage(tests)
+	return SupportCoverage(tests)
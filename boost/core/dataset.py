@@ -0,0 +1,59 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+import numpy
+
+''' Class Dataset '''
+
+# Training set with integer-interned instances. It behaves like the
+# {key: class} dictionary built by the reader, but its keys are dense
+# ids (0 ~ n-1) and the labels are kept in a compact array
+class Dataset(object):
+
+	#
+	def __init__(self, names, labels, classes):
+		self.names = names # id -> original instance key
+		self.ids = {name: i for i, name in enumerate(names)} # original key -> id
+		self.classes = sorted(classes)
+
+		self.labels = numpy.array(labels, dtype=numpy.int32) # id -> class
+		self.codes = numpy.searchsorted(self.classes, self.labels).astype(numpy.int32) # id -> class position
+
+	#
+	def __getitem__(self, i):
+		return int(self.labels[i])
+
+	#
+	def __contains__(self, i):
+		return 0 <= i < len(self.names)
+
+	#
+	def __iter__(self):
+		return iter(xrange(len(self.names)))
+
+	#
+	def __len__(self):
+		return len(self.names)
+
+	#
+	def keys(self):
+		return range(len(self.names))
+
+	# Ids of the instances of a given class
+	def members(self, class_):
+		return numpy.flatnonzero(self.labels == class_).astype(numpy.int32)
+
+	# Array of per-instance values given either as {id: value} or {key: value}
+	def array(self, values, dtype=float):
+		if len(values) > 0 and isinstance(next(iter(values)), basestring):
+			return numpy.array([values[name] for name in self.names], dtype=dtype)
+
+		return numpy.array([values[i] for i in xrange(len(self.names))], dtype=dtype)
+
+# Dataset of a {key: class} dictionary (or the dataset itself)
+def dataset_of(train, classes):
+	if isinstance(train, Dataset): return train
+
+	names = train.keys()
+	return Dataset(names, [train[name] for name in names], classes)
@@ -0,0 +1,103 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+import math
+import numpy
+
+''' Class Distribution '''
+
+# Lazily normalized instance weights. Updates on a few instances touch
+# their raw weights, updates on whole classes go to per-class scales
+# kept in log-space, and the normalizer comes from the class sums:
+#   weight of i = raw[i] * exp(logscale[class of i] - lognorm)
+class Distribution(object):
+
+	# Raw class sums are folded into the scales outside [e^-RANGE, e^RANGE]
+	RANGE = 200.0
+
+	# Class sums are counted again when an update removes this much of them
+	RECOUNT = 0.5
+
+	#
+	def __init__(self, codes, K, weights, extra=None):
+		self.codes = codes
+		self.raw = weights # Raw weights (updated in place)
+		self.logscale = numpy.zeros(K)
+		self.lognorm = 0.0
+
+		# Raw class sums and extra class mass (outside the training set)
+		self.sums = numpy.bincount(codes, weights=weights, minlength=K)
+		self.extra = numpy.zeros(K) if extra is None else numpy.array(extra, dtype=float)
+
+		# Log of the largest growth of any unnormalized weight so far
+		self.growth = 0.0
+
+	# Normalizer from the class sums (False if there is no mass left)
+	def normalize(self):
+		self.refold()
+
+		top = self.logscale.max()
+		normalizer = (numpy.exp(self.logscale - top) * (self.sums + self.extra)).sum()
+		if normalizer <= 0: return False
+
+		self.lognorm = top + math.log(normalizer)
+		return True
+
+	# Factors from raw weights to normalized ones, per class
+	def scales(self):
+		return numpy.exp(self.logscale - self.lognorm)
+
+	# Normalized weight of each class (extra mass included)
+	def totals(self):
+		return (self.sums + self.extra) * self.scales()
+
+	# Normalized weights of every instance
+	def weights(self):
+		return self.raw * self.scales()[self.codes]
+
+	# Multiplies every weight of each class by its factor
+	def scale(self, factors):
+		self.logscale += numpy.log(factors)
+		self.growth += math.log(max(1.0, factors.max()))
+
+	# Multiplies the raw weights of ids (all instances if None) by factors
+	# Returns the raw deltas of ids
+	def multiply(self, factors, ids=None):
+		if ids is None:
+			self.raw *= factors
+			self.sums = numpy.bincount(self.codes, weights=self.raw, minlength=len(self.sums))
+			self.growth += math.log(factors.max())
+			return None
+
+		old = self.raw[ids]
+		self.raw[ids] = old * factors
+		delta = self.raw[ids] - old
+
+		# Class sums: deltas, or a recount when they cancel most of a sum
+		sums = self.sums + numpy.bincount(self.codes[ids], weights=delta, minlength=len(self.sums))
+		if (sums < self.RECOUNT * self.sums).any():
+			sums = numpy.bincount(self.codes, weights=self.raw, minlength=len(self.sums))
+
+		self.sums = sums
+		self.growth += math.log(max(1.0, factors.max()))
+
+		return delta
+
+	# Moves the magnitude of far-off raw class sums into the class scales
+	def refold(self):
+		with numpy.errstate(divide='ignore'):
+			far = (self.sums > 0) & (numpy.abs(numpy.log(self.sums)) > self.RANGE)
+
+		if far.any():
+			factors = numpy.where(far, 1.0 / numpy.where(far, self.sums, 1.0), 1.0)
+
+			self.raw *= factors[self.codes]
+			self.sums *= factors
+			self.extra *= factors
+			self.logscale -= numpy.log(factors)
+			self.rescaled(factors)
+
+	# Raw class weights were multiplied by factors (hook for cached sums)
+	def rescaled(self, factors):
+		pass
@@ -11,9 +11,29 @@ class Itemset(object):
 	def __init__ (self, id, pattern, supp, default=False):
 		self.id = id
 		self.patterns = [pattern]
-		self.supp = supp
 		self.default = default # Default itemset
 
+		# Support index view
+		self.index = None
+		self.row = None
+		self.supp = supp
+
+	# Support per class: its own dictionary or a view of the support index
+	@property
+	def supp(self):
+		if self.index is not None: return self.index.support(self.row)
+		return self._supp
+
+	@supp.setter
+	def supp(self, supp):
+		self._supp = supp
+
+	# Turns the itemset into a view of a support index row
+	def view(self, index, row):
+		self.index = index
+		self.row = row
+		self._supp = None
+
 	#
 	def append(self, pattern, free=False):
 		# Append if it is a free itemset
@@ -0,0 +1,58 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+import numpy
+
+''' Class ClosedMiner '''
+
+# Closed itemsets of a set of transactions, mined in process as LCM does
+# [Uno et al., LCM ver.3]: closed itemsets are extended by prefix-preserving
+# closure extensions over the transactions x features bitmap, whose columns
+# are the features' vertical bitmaps. Each extension works on the rows of
+# its support and on the features frequent in them (database reduction)
+class ClosedMiner(object):
+
+	# Transactions: lists of int features. Minimum: support size (as -z)
+	def __init__(self, transactions, minimum=1):
+		self.features = numpy.array(sorted(set(f for t in transactions for f in t)), dtype=numpy.int64)
+		self.minimum = max(int(minimum), 1)
+
+		# Vertical bitmaps: column c holds the rows of feature features[c]
+		self.bitmaps = numpy.zeros((len(transactions), len(self.features)), dtype=bool)
+		for r, transaction in enumerate(transactions):
+			self.bitmaps[r, numpy.searchsorted(self.features, list(transaction))] = True
+
+	# Closed itemsets (features, rows) with non-empty features, depth-first
+	def __iter__(self):
+		if len(self.bitmaps) < self.minimum: return
+
+		# Extensions to visit: (rows, columns, bitmaps, closed, core). The
+		# root's closed features are the ones of every transaction
+		rows = numpy.arange(len(self.bitmaps))
+		columns = numpy.arange(len(self.features))
+		stack = [(rows, columns, self.bitmaps, self.bitmaps.all(axis=0), -1)]
+
+		while len(stack) > 0:
+			rows, columns, bitmaps, closed, core = stack.pop()
+			if closed.any(): yield self.features[columns[closed]], rows
+
+			# Frequent features of the rows (the closed ones are all frequent)
+			frequent = bitmaps.sum(axis=0) >= self.minimum
+			candidates = numpy.flatnonzero(frequent & ~closed & (columns > core))
+
+			reduced = columns[frequent]
+			children = []
+
+			for c in candidates:
+				support = bitmaps[:, c]
+				bitmaps_ = bitmaps[support][:, frequent]
+				closed_ = bitmaps_.all(axis=0)
+
+				# Prefix-preserving: no feature before the extension is added
+				if (closed_ & ~closed[frequent] & (reduced < columns[c])).any(): continue
+
+				children.append((rows[support], reduced, bitmaps_, closed_, columns[c]))
+
+			# Extensions visited in order
+			stack.extend(reversed(children))
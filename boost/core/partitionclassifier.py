@@ -36,4 +36,8 @@ class PartitionClassifier(AbstractClassifier):
 					return (self.pred, self.conf)		
 
 		# If not covered or outside support
-		return (self.pred_, self.conf_)
\ No newline at end of file
+		return (self.pred_, self.conf_)
+
+	#
+	def outcomes(self):
+		return (self.pred, self.conf), (self.pred_, self.conf_)
@@ -0,0 +1,187 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+import numpy
+from array import array
+
+''' Class SupportIndex '''
+
+# Itemset x instance incidence matrix in CSR layout. Each row keeps
+# the ids of an itemset's support sorted by class and then by id, so
+# the support of a single class is a contiguous slice of the row
+class SupportIndex(object):
+
+	# Segments and class offsets may be given (e.g. views of a binary file)
+	def __init__(self, dataset, indptr, indices, classptr=None, segments=None):
+		self.dataset = dataset
+		self.classes = dataset.classes
+		self.indptr = indptr # Row r is indices[indptr[r]:indptr[r+1]]
+		self.indices = indices # Instance ids
+
+		# Row-class segment of each entry
+		K = len(self.classes)
+		if segments is None:
+			rows = numpy.repeat(numpy.arange(len(self), dtype=numpy.intp), numpy.diff(indptr))
+			segments = rows * K + dataset.codes[indices]
+
+		self.segments = segments
+
+		# Class offsets: support of class k in row r is indices[classptr[r, k]:classptr[r, k+1]]
+		if classptr is None:
+			counts = numpy.bincount(self.segments, minlength=len(self) * K).reshape(len(self), K)
+			classptr = numpy.zeros((len(self), K + 1), dtype=numpy.intp)
+			classptr[:, 0] = indptr[:-1]
+			classptr[:, 1:] = indptr[:-1, None] + numpy.cumsum(counts, axis=1)
+
+		self.classptr = classptr
+
+		# Inverted index (instance -> rows), built on demand
+		self.invptr = None
+		self.invrows = None
+
+	#
+	def __len__(self):
+		return len(self.indptr) - 1
+
+	# Support ids of a row
+	def row(self, r):
+		return self.indices[self.indptr[r]:self.indptr[r + 1]]
+
+	# Support ids of a row, per class (views, no copies)
+	def support(self, r):
+		ptr = self.classptr[r]
+		return {class_: self.indices[ptr[k]:ptr[k + 1]] for k, class_ in enumerate(self.classes)}
+
+	# Support sizes of every row, per class
+	def sizes(self):
+		return numpy.diff(self.classptr, axis=1)
+
+	# Weighted support of every row, per class: (rows x classes) matrix
+	def weighted(self, weights):
+		K = len(self.classes)
+		return numpy.bincount(self.segments, weights=weights[self.indices],
+			minlength=len(self) * K).reshape(len(self), K)
+
+	# Inverted index: rows containing instance i are invrows[invptr[i]:invptr[i+1]]
+	def inverted(self):
+		if self.invptr is None:
+			K = len(self.classes)
+			order = numpy.argsort(self.indices, kind='mergesort')
+
+			self.invrows = (self.segments[order] // K).astype(numpy.int32)
+			self.invptr = numpy.zeros(len(self.dataset) + 1, dtype=numpy.intp)
+			numpy.cumsum(numpy.bincount(self.indices, minlength=len(self.dataset)), out=self.invptr[1:])
+
+		return self.invptr, self.invrows
+
+	# Sub-index with the given rows (in the given order)
+	def take(self, rows):
+		rows = numpy.asarray(rows, dtype=numpy.intp)
+		lengths = numpy.diff(self.indptr)[rows]
+
+		indptr = numpy.zeros(len(rows) + 1, dtype=numpy.intp)
+		numpy.cumsum(lengths, out=indptr[1:])
+
+		# Positions of the selected entries in the original layout
+		starts = numpy.repeat(self.indptr[rows] - indptr[:-1], lengths)
+		positions = starts + numpy.arange(indptr[-1], dtype=numpy.intp)
+
+		return SupportIndex(self.dataset, indptr, self.indices[positions])
+
+	# Memory used by the index arrays
+	def nbytes(self):
+		nbytes = self.indptr.nbytes + self.indices.nbytes + self.segments.nbytes + self.classptr.nbytes
+		if self.invptr is not None: nbytes += self.invptr.nbytes + self.invrows.nbytes
+
+		return nbytes
+
+''' Class SupportIndexBuilder '''
+
+# Collects supports row by row and builds a SupportIndex at once. Rows
+# are sorted (by class and then by id) and their class counts taken a
+# block at a time while they are added, so most of the sorting and
+# counting overlaps the reading of the supports
+class SupportIndexBuilder(object):
+
+	# Entries per sorted block
+	BLOCK = 1 << 20
+
+	#
+	def __init__(self, dataset):
+		self.dataset = dataset
+		self.indptr = array('l', [0])
+		self.indices = array('i')
+		self.sorted = 0 # Rows sorted so far
+		self.counts = [] # Class counts (rows x classes) of the sorted blocks
+
+	# Adds a row and returns its number (repeated ids are kept once, as
+	# in the sets of the dictionary mode)
+	def add(self, ids):
+		self.indices.extend(set(ids))
+		self.indptr.append(len(self.indices))
+
+		if len(self.indices) - self.indptr[self.sorted] >= self.BLOCK: self.sort()
+
+		return len(self.indptr) - 2
+
+	#
+	def __len__(self):
+		return len(self.indptr) - 1
+
+	# Sorts the rows added since the last call
+	def sort(self):
+		start, end = self.sorted, len(self.indptr) - 1
+		first, last = self.indptr[start], self.indptr[end]
+
+		# Copies: the arrays keep growing after this call
+		indices = numpy.array(self.indices[first:last], dtype=numpy.int32)
+		lengths = numpy.diff(numpy.array(self.indptr[start:end + 1], dtype=numpy.intp))
+
+		K = len(self.dataset.classes)
+		rows = numpy.repeat(numpy.arange(end - start), lengths)
+		codes = self.dataset.codes[indices]
+		order = numpy.lexsort((indices, codes, rows))
+
+		self.indices[first:last] = array('i', indices[order].tostring())
+		self.counts.append(numpy.bincount(rows * K + codes, minlength=(end - start) * K).reshape(end - start, K))
+		self.sorted = end
+
+	#
+	def build(self):
+		self.sort()
+
+		indptr = numpy.frombuffer(self.indptr, dtype=numpy.dtype('l')).astype(numpy.intp)
+		indices = numpy.frombuffer(self.indices, dtype=numpy.int32).copy()
+
+		# Class offsets from the counts of the blocks
+		counts = numpy.concatenate(self.counts)
+		classptr = numpy.zeros((len(self), len(self.dataset.classes) + 1), dtype=numpy.intp)
+		classptr[:, 0] = indptr[:-1]
+		classptr[:, 1:] = indptr[:-1, None] + numpy.cumsum(counts, axis=1)
+
+		return SupportIndex(self.dataset, indptr, indices, classptr)
+
+# Support index of a list of itemsets
+# Rows are shared when the itemsets are views of the same index
+def index_of(itemsets, dataset):
+	index = itemsets[0].index if len(itemsets) > 0 else None
+
+	if index is not None and index.dataset is dataset and all(it.index is index for it in itemsets):
+		rows = [it.row for it in itemsets]
+		if rows == range(len(index)): return index
+
+		return index.take(rows)
+
+	# Building it from the itemsets' own supports (ids or original keys)
+	builder = SupportIndexBuilder(dataset)
+	for it in itemsets:
+		if it.isdefault():
+			builder.add(dataset.keys())
+		else:
+			ids = [i for class_ in it.supp for i in it.supp[class_]]
+			if len(ids) > 0 and isinstance(ids[0], basestring): ids = [dataset.ids[i] for i in ids]
+
+			builder.add(ids)
+
+	return builder.build()
@@ -0,0 +1,68 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+import numpy
+
+from distribution import Distribution
+
+''' Class WeightedSupport '''
+
+# Lazily normalized weights plus the cached raw weighted support of
+# every itemset (row) per class. Updates on a few instances are applied
+# as deltas to the rows containing them, found through the inverted
+# index, and class scales apply to the cache without touching it
+class WeightedSupport(Distribution):
+
+	# Past this fraction of the entries a full recount is cheaper
+	RECOUNT_ENTRIES = 0.5
+
+	#
+	def __init__(self, index, weights, extra=None):
+		super(WeightedSupport, self).__init__(index.dataset.codes, len(index.classes), weights, extra)
+
+		self.index = index
+		self.cover = index.weighted(weights) # Raw (rows x classes)
+
+		# Number of entries touched by the last update
+		self.touched = 0
+
+	# Multiplies the raw weights of ids (all instances if None) by factors
+	def multiply(self, factors, ids=None):
+		# Whole training set: counting again
+		if ids is None:
+			super(WeightedSupport, self).multiply(factors)
+			self.recount()
+			return
+
+		invptr, invrows = self.index.inverted()
+		lengths = invptr[ids + 1] - invptr[ids]
+		self.touched = lengths.sum()
+
+		delta = super(WeightedSupport, self).multiply(factors, ids)
+
+		# Many rows affected: counting again
+		if self.touched > self.RECOUNT_ENTRIES * len(self.index.indices):
+			self.recount()
+			return
+
+		# Row-class cells of every (instance, row) pair
+		offsets = numpy.repeat(invptr[ids] - numpy.cumsum(lengths) + lengths, lengths)
+		rows = invrows[offsets + numpy.arange(self.touched)]
+		cells = rows * self.cover.shape[1] + numpy.repeat(self.codes[ids], lengths)
+
+		cells, position = numpy.unique(cells, return_inverse=True)
+		self.cover.flat[cells] += numpy.bincount(position, weights=numpy.repeat(delta, lengths))
+
+	#
+	def rescaled(self, factors):
+		self.cover *= factors
+
+	# Every row is a candidate (see CandidateSearch), normalized
+	def candidates(self, evaluate=None, limit=None):
+		return numpy.arange(len(self.index)), self.cover * self.scales()
+
+	# Weighted supports from scratch
+	def recount(self):
+		self.cover = self.index.weighted(self.raw)
+		self.touched = len(self.index.indices)
@@ -0,0 +1,435 @@
+#!/usr/bin/python
+
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+'''
+
+Description
+-----------
+Boosting - lazy mode driver
+
+The training file is loaded once and projected, in memory, onto the
+features of each test instance. The projection is mined by the external
+miner through a pipe, or in process by the native miner (core.miner),
+and handed to the boosters (see main.learn)
+
+'''
+
+# Imports
+import os
+import sys
+import json
+import argparse
+import collections
+import tempfile
+import subprocess
+
+# Local imports
+import main
+import utils.settings as settings
+import utils.reader as reader
+import utils.writer as writer
+import utils.parallel as parallel
+
+from utils.cache import Cache, digest
+from core.dataset import Dataset
+from core.instance import Instance
+from core.miner import ClosedMiner
+
+# Argument parsing method
+def arg_parsing(argv=None):
+	# Argument Parsing
+	parser = argparse.ArgumentParser(description="Boosting module (lazy mode)")
+
+	# Main arguments
+	parser.add_argument("-s", nargs=1, required=True, help="Training set file")
+	parser.add_argument("-t", nargs=1, required=True, help="Testing set file")
+	parser.add_argument("-b", nargs=1, help="Maximum number of rounds")
+
+	parser.add_argument("-o", help="Uses the original sizes of each class", action="store_true")
+	parser.add_argument("-j", help="Uses Jaccard's indexes", action="store_true")
+	parser.add_argument("-c", help="Internal Cross Validation", action="store_true")
+
+	# Miner
+	parser.add_argument("-z", nargs=1, default=["1"], help="Minimum support size (default: 1)")
+	parser.add_argument("-m", help="Mines with Multidupehack (default: D-peeler)", action="store_true")
+	parser.add_argument("-l", help="Mines with LCM (default: D-peeler)", action="store_true")
+	parser.add_argument("-n", help="Mines in process with the native miner (default: D-peeler)", action="store_true")
+	parser.add_argument("-g", help="Mines the training set once and filters its itemsets", action="store_true")
+
+	# Algorithms
+	parser.add_argument("-Z", help="ZERO Classifier", action="store_true")
+	parser.add_argument("-A", help="Associative Classifier", action="store_true")
+	parser.add_argument("-D", help="Discrete Adaboost", action="store_true")
+	parser.add_argument("-C", help="Confidence-rated Adaboost", action="store_true")
+	parser.add_argument("-S", help="SLIPPER Classifier", action="store_true")
+
+	# Other settings
+	parser.add_argument("--free", help="Uses only free itemsets", action="store_true")
+	parser.add_argument("--seed", nargs=1, help="Random objects' seed")
+	parser.add_argument("--index", help="Integer-indexed reader mode", action="store_true")
+	parser.add_argument("--bnb", help="Bounded candidate search of SLIPPER (indexed mode)", action="store_true")
+	parser.add_argument("--processes", nargs=1, help="Worker processes (default: one per core)")
+
+	# Cache of mined itemsets and trained models
+	parser.add_argument("--cache-memory", nargs=1, help="Megabytes of cache kept in memory")
+	parser.add_argument("--cache-disk", nargs=1, help="Megabytes of cache kept on disk")
+	parser.add_argument("--cache-dir", nargs=1, help="Cache directory (shared by later runs)")
+
+	# Settings of main.learn
+	parser.set_defaults(save=None)
+
+	args = parser.parse_args(argv)
+	if args.bnb and not args.index: parser.error("--bnb needs --index")
+
+	return args
+
+''' Class Projector '''
+
+# Training file (LUCS-KDD) kept in memory with a feature -> rows index.
+# Features are kept as the file's tokens, as the awk projection did
+class Projector(object):
+
+	#
+	def __init__(self, file):
+		self.rows = []
+		self.labels = []
+		self.sizes = {}
+		self.inverted = {}
+
+		with reader.open_input(file) as handler:
+			for row in handler:
+				row = row.split()
+				if len(row) == 0: continue
+
+				for f in row[:-1]: self.inverted.setdefault(f, []).append(len(self.rows))
+
+				self.rows.append(row[:-1])
+				self.labels.append(int(row[-1]))
+				self.sizes[self.labels[-1]] = self.sizes.get(self.labels[-1], 0) + 1
+
+	# Projection onto features: (NR, projected features, class, Jaccard's
+	# index) for the rows sharing any feature. The row deleted (if any) is
+	# left out and the rows after it are renumbered
+	def project(self, features, deleted=None):
+		intersection = {}
+		for f in set(features):
+			for r in self.inverted.get(f, []): intersection[r] = intersection.get(r, 0) + 1
+
+		n = len(features)
+		features = set(features)
+		projection = []
+
+		for r in sorted(intersection):
+			if r == deleted: continue
+
+			# Jaccard's index as printed by awk
+			union = n + len(self.rows[r]) - intersection[r]
+			jaccard = float("%.6g" % (float(intersection[r]) / union))
+
+			projection.append((self.number(r, deleted), [f for f in self.rows[r] if f in features], self.labels[r], jaccard))
+
+		return projection
+
+	# The whole training set as a projection
+	def whole(self):
+		return [(r + 1, self.rows[r], self.labels[r], None) for r in xrange(len(self.rows))]
+
+	# NR of a row once the row deleted (if any) is left out
+	def number(self, r, deleted=None):
+		return r + 1 if deleted is None or r < deleted else r
+
+''' Class GlobalItemsets '''
+
+# Closed itemsets mined once on the whole training set, filtered for each
+# test instance. Every closed itemset of a projection is a global one
+# restricted to the instance's features, so the restricted patterns are
+# closed again over their supports (projector's tidlists) and duplicated
+# supports are dropped. Itemsets keep the order the miner printed their
+# first global pattern in
+class GlobalItemsets(object):
+
+	# Patterns: frozensets of features in the miner's order (see patterns_of)
+	def __init__(self, projector, patterns, minimum=1):
+		self.projector = projector
+		self.minimum = minimum
+
+		# Patterns, their positions in the miner's output and feature -> patterns index
+		self.patterns = []
+		self.positions = []
+		self.inverted = {}
+
+		# Position of the empty pattern (None if the miner printed none)
+		self.empty = None
+
+		for position, pattern in enumerate(patterns):
+			if len(pattern) == 0:
+				if self.empty is None: self.empty = position
+				continue
+
+			for f in pattern: self.inverted.setdefault(f, []).append(len(self.patterns))
+			self.patterns.append(pattern)
+			self.positions.append(position)
+
+		# Tidlists: feature -> rows
+		self.tidlists = {f: frozenset(rows) for f, rows in projector.inverted.iteritems()}
+
+	# Itemsets of a projection onto features (as D-peeler prints them)
+	def project(self, features, deleted=None):
+		features = set(features)
+
+		# Restricted patterns and their first global pattern
+		restricted = {}
+		for f in features:
+			for p in self.inverted.get(f, []):
+				pattern = self.patterns[p] & features
+				restricted[pattern] = min(restricted.get(pattern, p), p)
+
+		# Closed patterns by support, at their first position
+		closed = {}
+		for pattern, p in sorted(restricted.items(), key=lambda item: item[1]):
+			rows = frozenset.intersection(*[self.tidlists[f] for f in pattern]) - frozenset([deleted])
+			if len(rows) < self.minimum or rows in closed: continue
+
+			closed[rows] = (self.positions[p], features.intersection(*[self.projector.rows[r] for r in rows]))
+
+		# Empty pattern: closed when the projection's rows share no feature
+		if self.empty is not None:
+			rows = frozenset().union(*[self.tidlists.get(f, ()) for f in features]) - frozenset([deleted])
+			if len(rows) >= self.minimum and rows not in closed and \
+				len(features.intersection(*[self.projector.rows[r] for r in rows])) == 0:
+				closed[rows] = (self.empty, set())
+
+		lines = []
+		for rows, (position, pattern) in sorted(closed.items(), key=lambda item: item[1][0]):
+			support = ",".join(str(self.projector.number(r, deleted)) for r in sorted(rows))
+			pattern = ",".join(sorted(pattern, key=int)) if len(pattern) > 0 else '\xc3\xb8' # Empty pattern
+			lines.append(support + " " + pattern + "\n")
+
+		return lines
+
+# Patterns of a miner's output lines
+def patterns_of(lines, lcm=False):
+	for row, line in enumerate(lines):
+		# LCM: f f f <new line> s s s
+		if lcm:
+			if row % 2 == 0: yield frozenset(line.split())
+
+		# Multidupehack or D-peeler: s,s,s f,f,f
+		else:
+			line = line.split()
+			if len(line) < 2: continue
+
+			if line[1].startswith('\xc3\xb8'): yield frozenset() # Empty pattern
+			else: yield frozenset(line[1].split(","))
+
+# Patterns of a projection mined by the native miner
+def native_patterns(projection, minimum=1):
+	miner = ClosedMiner([[int(f) for f in features] for nr, features, class_, index in projection], minimum)
+	for features, rows in miner: yield frozenset(str(f) for f in features)
+
+# Projection renumbered by its rows' contents: the rows (NR, features,
+# class, Jaccard's index) sorted by all but their NR and numbered from 1,
+# and the new NR of each former one. The test instance's row and the
+# rows' positions in the training file then change neither the miner's
+# input nor the models, so they are cached by contents alone
+def canonical(projection):
+	rows = sorted(projection, key=lambda row: row[1:])
+	numbers = {nr: n + 1 for n, (nr, features, class_, index) in enumerate(rows)}
+
+	return [(n + 1, features, class_, index) for n, (nr, features, class_, index) in enumerate(rows)], numbers
+
+# Lines of itemsets (s,s,s f,f,f) with their supports renumbered
+def renumbered(lines, numbers):
+	for line in lines:
+		support, features = line.split()
+		yield ",".join(str(n) for n in sorted(numbers[int(nr)] for nr in support.split(","))) + " " + features + "\n"
+
+# Runs the miner on a projection, returning its output lines
+# The output is cached by the miner's command and input
+def mine(projection, args, cache):
+	if args.l:
+		command = ["lcm", "IC_", None, "0", "-"]
+		rows = [",".join(features) + "\n" for nr, features, class_, index in projection]
+	elif args.m:
+		command = ["multidupehack", "-s", args.z[0] + " 0", "-u", "1", "-o", "/dev/stdout", "/dev/stdin"]
+		rows = ["%d %s 1\n" % (nr, ",".join(features)) for nr, features, class_, index in projection]
+	else:
+		command = ["d-peeler", "-s", args.z[0] + " 0", "-o", "/dev/stdout", "/dev/stdin"]
+		rows = ["%d %s\n" % (nr, ",".join(features)) for nr, features, class_, index in projection]
+
+	key = digest(command, rows)
+	output = cache.get("itemsets", key)
+
+	if output is None:
+		# Multidupehack or D-peeler: rows through a pipe
+		stdin = "".join(rows)
+
+		# LCM reads its input more than once: it needs a file
+		if args.l:
+			handle, command[2] = tempfile.mkstemp(prefix="lazy.")
+			with os.fdopen(handle, "w") as handler: handler.write(stdin)
+			stdin = ""
+
+		try:
+			with open(os.devnull, "w") as devnull:
+				process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+					stderr=(None if args.m else devnull))
+				output = process.communicate(stdin)[0]
+		finally:
+			if args.l: os.unlink(command[2])
+
+		# Plain errors: they are sent back by the worker processes
+		if process.returncode != 0: raise OSError("%s exited with status %d" % (command[0], process.returncode))
+
+		cache.put("itemsets", key, output)
+
+	return output.splitlines(True)
+
+# Trains the models of main.fit on a projection and its itemsets (lines
+# of a miner's output or, in the native mode, the projection's transactions)
+def fit(projection, projector, args, lines, mode=None):
+	# Classes ordered as their files were listed
+	classes = sorted(set(class_ for nr, features, class_, index in projection), key=str)
+	sizes = {class_: 0 for class_ in classes}
+
+	# Training instances, grouped by class
+	names, labels = [], []
+	for class_ in classes:
+		for nr, features, label, index in projection:
+			if label == class_:
+				names.append(str(nr))
+				labels.append(class_)
+
+	for class_ in labels: sizes[class_] += 1
+
+	if args.index: train = Dataset(names, labels, classes)
+	else: train = dict(zip(names, labels))
+
+	# Itemsets
+	itemsets = reader.read_itemsets(lines, train, classes, mode, args.free, int(args.z[0]))
+
+	# Original sizes
+	if args.o: extra = {class_: projector.sizes[class_] - sizes[class_] for class_ in classes}
+	else: extra = None
+
+	# Jaccard's indexes
+	if args.j:
+		if args.index: jaccard = {train.ids[str(nr)]: index for nr, features, class_, index in projection}
+		else: jaccard = {str(nr): index for nr, features, class_, index in projection}
+	else: jaccard = None
+
+	return main.fit(args, train, classes, sizes, itemsets, extra, jaccard)
+
+# Cache of the arguments (budgets in megabytes)
+def cache_of(args):
+	megabytes = lambda value: None if value is None else int(float(value[0]) * (1 << 20))
+
+	return Cache(megabytes(args.cache_memory), megabytes(args.cache_disk),
+		args.cache_dir[0] if args.cache_dir is not None else None)
+
+# Classifies the test instances, printing their predictions to out
+# Test instances whose projection is empty are skipped. The models are
+# trained by a pool of processes (settings.PROCESSES), one test instance
+# at a time, and the predictions are printed in the test file's order
+def run(args, out=sys.stdout):
+	if args.processes is not None: settings.PROCESSES = int(args.processes[0])
+
+	projector = Projector(args.s[0])
+	cache = cache_of(args)
+
+	# Itemsets of the whole training set (filtered for each test instance)
+	if args.g and args.n: mined = GlobalItemsets(projector, native_patterns(projector.whole(), int(args.z[0])), int(args.z[0]))
+	elif args.g: mined = GlobalItemsets(projector, patterns_of(mine(projector.whole(), args, cache), args.l), 0 if args.l else int(args.z[0]))
+	else: mined = None
+
+	# Options the models depend on: the bounded search finds the rules of the
+	# exhaustive search and the indexed mode only changes the folds of the
+	# internal cross-validation
+	ignored = ["s", "t", "processes", "cache_memory", "cache_disk", "cache_dir", "bnb"]
+	if not args.c: ignored.append("index")
+
+	options = sorted((name, value) for name, value in vars(args).items() if name not in ignored)
+
+	# Trained models (JSON documents), cached by the contents of their
+	# training set (see canonical) and options
+	def key_of(projection):
+		return digest(options, sorted((features, class_, index if args.j else None) for nr, features, class_, index in projection),
+			projector.sizes if args.o else None)
+
+	# Worker: models of a test instance and the hits, misses and new
+	# entries of the miner's cache (stored by the parent). Workers project
+	# the training set again, so only its features are sent to them
+	def document_of(key, features, deleted):
+		counters = (cache.hits, cache.misses, cache.added)
+		cache.hits, cache.misses, cache.added = collections.Counter(), collections.Counter(), []
+
+		try:
+			projection, numbers = canonical(projector.project(features, deleted))
+
+			if mined is not None: models, default_class, tmax = fit(projection, projector, args,
+				renumbered(mined.project(features, deleted), numbers))
+			elif args.n: models, default_class, tmax = fit(projection, projector, args,
+				[(str(nr), features) for nr, features, class_, index in projection], "native")
+			else: models, default_class, tmax = fit(projection, projector, args,
+				mine(projection, args, cache), "lcm" if args.l else None)
+
+			document = json.dumps(writer.models_document(models, default_class, tmax), separators=(",", ":"))
+			return key, document, cache.hits, cache.misses, cache.added
+		finally:
+			cache.hits, cache.misses, cache.added = counters
+
+	# Test instances (key, instance) and models to train: the first
+	# instance of each key that is not cached
+	instances = []
+	documents = {}
+	tasks = []
+
+	with reader.open_input(args.t[0]) as handler:
+		for row, example in enumerate(handler):
+			example = example.split()
+			if len(example) == 0: continue
+
+			# Projected training set: the test's row is left out (as runner.sh did)
+			deleted = row
+			projection = projector.project(example[:-1], deleted)
+			if len(projection) == 0: continue
+
+			key = key_of(projection)
+			instances.append((key, Instance(0, set(int(f) for f in example[:-1]), int(example[-1]))))
+
+			if key in documents:
+				cache.hits["models"] += 1
+				continue
+
+			documents[key] = cache.get("models", key)
+			if documents[key] is None: tasks.append((key, example[:-1], deleted))
+
+	# Predictions in order, as soon as the models are trained
+	last = {key: position for position, (key, test) in enumerate(instances)}
+	with parallel.pimap(document_of, tasks) as trained:
+		for position, (key, test) in enumerate(instances):
+			while documents[key] is None:
+				key_, document, hits, misses, added = next(trained)
+				documents[key_] = document
+
+				for kind, key__, value in added: cache.put(kind, key__, value)
+				cache.put("models", key_, document)
+
+				cache.hits.update(hits)
+				cache.misses.update(misses)
+
+			models, default_class, settings.MAX_ROUNDS, tmax = reader.models_of(json.loads(documents[key]))
+			main.output([test], models, default_class, tmax, out)
+
+			if last[key] == position: del documents[key]
+
+	# Hit and miss rates
+	cache.flush()
+	for line in cache.report(): sys.stderr.write(line + "\n")
+
+# MAIN
+if __name__ == "__main__":
+	run(arg_parsing())
@@ -13,11 +13,18 @@ Boosting - main module
 '''
 
 # Imports
+import os
+import sys
 import argparse
+import functools
+import tempfile
+import StringIO
 
 # Local imports
 import utils.settings as settings
 import utils.reader as reader
+import utils.writer as writer
+import utils.server as server
 import utils.utils as utils
 import utils.metrics as metrics
 
@@ -27,20 +34,24 @@ import algs.dboost as dboost
 import algs.cboost as cboost
 import algs.slipper as slipper
 
+from core.coverage import BitmapCoverage
+from core.compiledlac import CompiledLAC
+
 # Argument parsing method
-def arg_parsing():
+def arg_parsing(argv=None):
 	# Argument Parsing
 	parser = argparse.ArgumentParser(description="Boosting module")
 
 	# Main arguments
-	parser.add_argument("-s", nargs="*", help="Traininig set files", required=True)
-	parser.add_argument("-t", nargs=1, help="Testing set file", required=True)
-	parser.add_argument("-i", nargs=1, help="Itemsets file", required=True)
+	parser.add_argument("-s", nargs="*", help="Traininig set files")
+	parser.add_argument("-t", nargs=1, help="Testing set file")
+	parser.add_argument("-i", nargs=1, help="Itemsets file (native reader mode: training file to mine)")
 	parser.add_argument("-b", nargs=1, help="Maximum number of rounds")
 	
 	parser.add_argument("-o", nargs=1, help="Original sizes of each class")
 	parser.add_argument("-j", nargs=1, help="Jaccard's indexes")
 	parser.add_argument("-c", help="Internal Cross Validation", action="store_true")
+	parser.add_argument("-z", nargs=1, default=["1"], help="Minimum support size (native reader mode, default: 1)")
 
 	# Algorithms
 	parser.add_argument("-Z", help="ZERO Classifier", action="store_true")
@@ -51,44 +62,124 @@ def arg_parsing():
 	
 	# Other settings
 	parser.add_argument("--free", help="Uses only free itemsets", action="store_true")
-	parser.add_argument("--rmode", nargs=1, help="Reader mode")
+	parser.add_argument("--rmode", nargs=1, help="Reader mode (lcm, native: in process miner)")
 	parser.add_argument("--seed", nargs=1, help="Random objects' seed")
+	parser.add_argument("--index", help="Integer-indexed reader mode", action="store_true")
+	parser.add_argument("--bnb", help="Bounded candidate search of SLIPPER (indexed mode)", action="store_true")
+	parser.add_argument("--processes", nargs=1, help="Worker processes (default: one per core)")
+	parser.add_argument("--save", nargs=1, help="Saves the trained models (.gz: compressed)")
+	parser.add_argument("--load", nargs=1, help="Loads trained models instead of training")
+	parser.add_argument("--icache", nargs=1, help="Binary itemsets cache (read if valid, written otherwise)")
+	parser.add_argument("--serve", nargs=1, help="Serves jobs on a Unix socket ('-': stdin)")
+
+	args = parser.parse_args(argv)
+
+	# Serving: jobs bring their own arguments
+	if args.serve is not None: return args
+
+	if args.t is None: parser.error("-t is required")
+	if args.bnb and not args.index: parser.error("--bnb needs --index")
+
+	# Training needs the training set and the itemsets (or their cache)
+	if args.load is None and (args.s is None or (args.i is None and args.icache is None)):
+		parser.error("-s and -i (or --icache) are required unless --load is given")
+
+	return args
+
+# Branch-and-bound statistics
+def report(name, stats):
+	if len(stats) > 0:
+		sys.stderr.write("# %s: %d candidates skipped, %d evaluated\n" % (name, stats["skipped"], stats["evaluated"]))
+
+# Prints the predictions of the models for each test instance
+# tmax: (model, rounds) chosen by the internal cross-validation or None
+def output(test, models, default_class, tmax=None, out=sys.stdout):
+	# Predictions (instances x rounds): the boosted models' rules compiled into bitmaps
+	coverage = BitmapCoverage([h.itemset for model, name, ppr, average in models
+		if not isinstance(model, CompiledLAC) for h, alpha in model], test)
+	blocks = [("~" + name, utils.predictions(model, test, default_class, ppr, average, coverage))
+		for model, name, ppr, average in models]
+
+	# Chosen prefixes of a model: its predictions at those rounds
+	if tmax is not None:
+		model, rounds = tmax
+		pred = utils.predictions(model, test, default_class, True, False, coverage)
+		blocks.append(("~Tmax", pred[:, [min(r, pred.shape[1] - 1) for r in rounds]]))
 
-	return parser.parse_args()
-
-# MAIN
-if __name__ == "__main__":
-	# Arguments
-	args = arg_parsing()
+	# <inst_class> <~alg_1> <pred_1> ... <pred_n> <~alg_2> <pred_1> <pred_1>
+	for i, inst in enumerate(test):
+		line = [str(inst.class_)]
+
+		for name, pred in blocks:
+			line.append(name)
+			line.extend(str(p) for p in pred[i])
+
+		out.write(" ".join(line) + " \n")
+
+# Runs the command line arguments, printing the predictions to out
+def run(args, out=sys.stdout):
+	# Trained models: predictions only
+	if args.load is not None:
+		models, default_class, settings.MAX_ROUNDS, tmax = reader.read_models(args.load[0])
+		output(reader.read_test(args.t[0]), models, default_class, tmax, out)
+		return
 	
 	# Reading train
-	train, classes, sizes = reader.read_train(args.s)
+	train, classes, sizes = reader.read_train(args.s, args.index)
 	# Reading test
 	test = reader.read_test(args.t[0])
-	# Reading itemsets
-	itemsets = reader.read_itemsets(
-		args.i[0], train, classes, 
-		(args.rmode[0] if args.rmode is not None else None), 
-		args.free)
+	# Reading itemsets (binary cache, if it was written for this training set)
+	rmode = args.rmode[0] if args.rmode is not None else None
+	itemsets = None
+
+	if args.icache is not None and os.path.exists(args.icache[0]):
+		itemsets = reader.read_binary_itemsets(args.icache[0], train, classes, rmode, args.free)
+
+	if itemsets is None:
+		if args.i is None: raise ValueError("Itemsets cache of another training set or reader mode: " + args.icache[0])
+
+		orders = [] if args.icache is not None and not args.index else None
+		itemsets = reader.read_itemsets(args.i[0], train, classes, rmode, args.free, int(args.z[0]), orders)
+		if args.icache is not None: writer.write_itemsets(args.icache[0], itemsets, train, classes, rmode, args.free, orders)
 	
 	# Reading original sizes
 	if args.o is not None:
-		print args.o
+		print >> out, args.o
 		sizes_ = reader.read_sizes(args.o[0])
 		extra = {class_: sizes_[class_] - sizes[class_] for class_ in classes}
 	else: extra = None
 
 	# Reading Jaccard's indexes
-	if args.j is not None: jaccard = reader.read_jaccard(args.j[0])
+	if args.j is not None: jaccard = reader.read_jaccard(args.j[0], train)
 	else: jaccard = None
 
+	learn(args, train, classes, sizes, test, itemsets, extra, jaccard, out)
+
+# Trains the models asked by args and prints their predictions to out
+def learn(args, train, classes, sizes, test, itemsets, extra=None, jaccard=None, out=sys.stdout):
+	models, default_class, tmax = fit(args, train, classes, sizes, itemsets, extra, jaccard)
+
+	# Saving trained models
+	if args.save is not None: writer.write_models(args.save[0], models, default_class, tmax)
+
+	# Predictions
+	output(test, models, default_class, tmax, out)
+
+# Trains the models asked by args: (models, default class, Tmax or None)
+# The SLIPPER variants use extra and jaccard when they are given
+def fit(args, train, classes, sizes, itemsets, extra=None, jaccard=None):
 	# Settings
-	if args.seed is not None: settings.RANDOM_SEED = int(args.seed)
+	if args.seed is not None: settings.RANDOM_SEED = int(args.seed[0])
 	if args.b is not None: settings.MAX_ROUNDS = int(args.b[0])
+	if args.processes is not None: settings.PROCESSES = int(args.processes[0])
 
 	# Default class
 	default_class = max(sizes, key=sizes.get)
 
+	# Vectorized engines for the indexed mode
+	if args.index: slipper_alg = functools.partial(slipper.vslipper, bnb=args.bnb)
+	else: slipper_alg = slipper.slipper
+
 	# Variables
 	models = []
 	black_icv = []
@@ -106,17 +197,31 @@ if __name__ == "__main__":
 
 	# LAC
 	if args.A == True:
-		lac_ = lac.lac(itemsets, classes)
+		lac_ = lac.clac(itemsets, classes)
 		models.append((lac_, "lac", False, True))
 
 		# print "@ Size-LAC", len(lac_), SUM(lac_)
 
 	# SLIPPER
 	if args.S == True:
-		slipper_ = slipper.slipper(itemsets, train, classes, settings.MAX_ROUNDS) #, weights=jaccard, extra=extra)
+		# Variants: plain, Jaccard, extra and Jaccard extra
+		variants = [("black", None, None)]
+		if jaccard is not None: variants.append(("black_jacc", jaccard, None))
+		if extra is not None: variants.append(("black_extra", None, extra))
+		if jaccard is not None and extra is not None: variants.append(("black_jacc_extra", jaccard, extra))
+
+		# Indexed mode: shared index, variants trained at once
+		stats = {}
+		if args.index: slippers_ = slipper.vslippers(itemsets, train, classes, settings.MAX_ROUNDS,
+			[(weights, extra_) for name, weights, extra_ in variants], args.bnb, stats)
+		else: slippers_ = [slipper_alg(itemsets, train, classes, settings.MAX_ROUNDS,
+			weights=(weights.copy() if weights is not None else None), extra=extra_) for name, weights, extra_ in variants]
+
+		for slipper_, (name, weights, extra_) in zip(slippers_, variants):
+			models.append((slipper_, name, True, False))
 		# print "@ empty-black:", sum([1 for h, alpha in slipper_ if h.itemset.isdefault()]),
 
-		models.append((slipper_, "black", True, False))		
+		if args.bnb: report("black", stats)
 
 		# Complexity
 		# old_max = max(itemsets, key=lambda x:x.size()[0]).size()[0]
@@ -136,35 +241,19 @@ if __name__ == "__main__":
 		# print ""
 
 		# for i in xrange(new_min, new_max + 1):
-		# 	slipper_ = slipper.slipper([it for it in itemsets if norm(it.size()[0]) <= i], train, classes, settings.MAX_ROUNDS)
+		# 	slipper_ = slipper_alg([it for it in itemsets if norm(it.size()[0]) <= i], train, classes, settings.MAX_ROUNDS)
 		# 	models.append((slipper_, "simpler_leq_"+str(i), True, False))
 
-		# SLIPPER JACCARD
-		if args.j is not None:
-			slipper_ = slipper.slipper(itemsets, train, classes, settings.MAX_ROUNDS, weights=jaccard.copy())
-			models.append((slipper_, "black_jacc", True, False))
-
-		# SLIPPER EXTRA
-		if args.o is not None:
-			slipper_ = slipper.slipper(itemsets, train, classes, settings.MAX_ROUNDS, extra=extra)
-			# print "empty-extra:", sum([1 for h, alpha in slipper_ if h.itemset.isdefault()])
-			models.append((slipper_, "black_extra", True, False))
-
-		# SLIPPER JACCARD EXTRA
-		if args.j is not None and args.o is not None:
-			slipper_ = slipper.slipper(itemsets, train, classes, settings.MAX_ROUNDS, weights=jaccard.copy(), extra=extra)
-			models.append((slipper_, "black_jacc_extra", True, False))
-
 		# Internal cross-validation
 		if args.c == True:
-			acc = utils.internalcv(itemsets, train, classes, slipper.slipper, jaccard, extra)
+			acc = utils.internalcv(itemsets, train, classes, slipper_alg, jaccard, extra)
 
 			# print "@ ModelSize",
 			for i in xrange(settings.MAX_ROUNDS):
 				rounds = acc[:i+1].index(max(acc[:i+1]))
-				slipper_chosen = slipper_[:rounds+1]
 
-				black_icv.append(slipper_chosen)
+				# Model slipper_[:rounds+1]
+				black_icv.append(rounds)
 				# print rounds+1,
 
 			# print ""
@@ -191,7 +280,8 @@ if __name__ == "__main__":
 
 	if args.D == True:
 		# DISCRETE BOOSTING: ALPHA
-		dboost_ = dboost.dboost(itemsets, train, classes, settings.MAX_ROUNDS)
+		if args.index: dboost_ = dboost.vdboost(itemsets, train, classes, settings.MAX_ROUNDS)
+		else: dboost_ = dboost.dboost(itemsets, train, classes, settings.MAX_ROUNDS)
 		models.append((dboost_, "dboost", True, False))
 
 		# DISCRETE BOOSTING: CONFIDENCE
@@ -225,33 +315,52 @@ if __name__ == "__main__":
 
 	# CONFIDENCE-RATED BOOSTING
 	if args.C == True:
-		cboost_ = cboost.cboost(itemsets, train, classes, settings.MAX_ROUNDS)
+		if args.index: cboost_ = cboost.vcboost(itemsets, train, classes, settings.MAX_ROUNDS, "margin")
+		else: cboost_ = cboost.cboost(itemsets, train, classes, settings.MAX_ROUNDS)
 		models.append((cboost_, "cboost", True, False))
 
 	# ZERO
 	if args.Z == True:
 		models.append((zero.zero(), "zero", False, False))
 
-	# Predictions
-	# <inst_class> <~alg_1> <pred_1> ... <pred_n> <~alg_2> <pred_1> <pred_1>
-	for inst in test:
-		print inst.class_, 
+	return models, default_class, ((slipper_, black_icv) if len(black_icv) > 0 else None)
+
+# Server job: {"args": [...], "input": "..."} -> predictions
+# The input, if any, is what the job reads as /dev/stdin (or -)
+def job(request):
+	argv = [str(arg) for arg in request["args"]]
+
+	# Input file
+	name = None
+	if request.get("input") is not None:
+		handle, name = tempfile.mkstemp(prefix="boost.")
+		with os.fdopen(handle, "w") as handler: handler.write(request["input"].encode("latin-1"))
 
-		for model, name, ppr, average in models:
-			print "~" + name,
-			pred = utils.prediction(model, inst, ppr, average)
+		argv = [(name if arg in ("/dev/stdin", "-") else arg) for arg in argv]
 
-			for p in pred:
-				if p == None: p = default_class
-				print p,
+	# Settings are restored after each job
+	saved = {key: value for key, value in vars(settings).items() if key.isupper()}
+	out = StringIO.StringIO()
 
-		if len(black_icv) > 0:
-			print "~Tmax",
-			for model in black_icv:
-				pred = utils.prediction(model, inst, False, False)
+	try:
+		args = arg_parsing(argv)
+		if args.serve is not None: raise ValueError("Jobs cannot serve")
+
+		run(args, out)
+	finally:
+		for key, value in saved.items(): setattr(settings, key, value)
+		if name is not None: os.unlink(name)
+
+	return out.getvalue()
+
+# MAIN
+if __name__ == "__main__":
+	# Arguments
+	args = arg_parsing()
 
-				for p in pred:
-					if p == None: p = default_class
-					print p,
+	# Resident server: modules stay loaded between jobs
+	if args.serve is not None:
+		if args.serve[0] == "-": server.serve_stream(job)
+		else: server.serve_socket(job, args.serve[0])
 
-		print ""
\ No newline at end of file
+	else: run(args)
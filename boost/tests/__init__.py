@@ -0,0 +1,3 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
\ No newline at end of file
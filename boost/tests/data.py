@@ -0,0 +1,82 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+'''
+
+Description
+-----------
+Synthetic data sets of the tests (run from boost/ with
+python -m unittest discover tests)
+
+'''
+
+# Imports
+import os
+import bz2
+import gzip
+import random
+
+# Local imports
+from core.miner import ClosedMiner
+
+CLASSES = [19, 20]
+
+# Rows (key, features, class) of a LUCS-KDD data set: attributes of some
+# values, the class telling whether the first two are equal (10% noise).
+# Keys are numbered from 1, as the runner's class files. With 2^k rows
+# the first weights of the boosters are exact, so the dict-based loops'
+# sums tie where the vectorized ones do
+def rows(seed, n=64, attributes=6, values=3):
+	generator = random.Random(seed)
+	rows = []
+
+	for r in xrange(n):
+		row = [generator.randrange(values) for a in xrange(attributes)]
+		class_ = CLASSES[(row[0] == row[1]) == (generator.random() < 0.1)]
+		rows.append((str(r + 1), [str(a * values + v + 1) for a, v in enumerate(row)], class_))
+
+	return rows
+
+# Training set (dict mode) of rows
+def train_of(rows):
+	return {key: class_ for key, features, class_ in rows}
+
+# Closed itemsets of rows, as D-peeler prints them: s,s,s f,f,f
+def itemsets_of(rows, minimum=1):
+	miner = ClosedMiner([[int(f) for f in features] for key, features, class_ in rows], minimum)
+
+	return ["%s %s\n" % (",".join(rows[r][0] for r in support), ",".join(str(f) for f in features))
+		for features, support in miner]
+
+# Writes a fold into directory: LUCS-KDD training and testing files, the
+# class files and the itemsets. Returns their paths
+def write(directory, train, test):
+	paths = {name: os.path.join(directory, name) for name in ("train", "test", "itemsets")}
+	paths["classes"] = [os.path.join(directory, "train.class.%d" % class_) for class_ in CLASSES]
+
+	with open(paths["train"], "w") as handler:
+		for key, features, class_ in train: handler.write(" ".join(features + [str(class_)]) + "\n")
+
+	with open(paths["test"], "w") as handler:
+		for key, features, class_ in test: handler.write(" ".join(features + [str(class_)]) + "\n")
+
+	for class_, file in zip(CLASSES, paths["classes"]):
+		with open(file, "w") as handler:
+			for key, features, class__ in train:
+				if class__ == class_: handler.write(key + "\n")
+
+	with open(paths["itemsets"], "w") as handler: handler.writelines(itemsets_of(train))
+
+	return paths
+
+# Compressed copy of a file (extension: .gz or .bz2). Returns its path
+def compress(file, extension):
+	opener = gzip.open if extension == ".gz" else bz2.BZ2File
+
+	handler = opener(file + extension, "wb")
+	try:
+		with open(file, "rb") as source: handler.write(source.read())
+	finally: handler.close()
+
+	return file + extension
@@ -0,0 +1,167 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+# Imports
+import time
+import functools
+import unittest
+
+# Local imports
+import utils.reader as reader
+import utils.utils as utils
+import algs.slipper as slipper
+import algs.cboost as cboost
+import algs.dboost as dboost
+from core.dataset import dataset_of
+import data
+
+# The dict-based loops compare float sums exactly while the vectorized
+# searches take rules tied within a tolerance (utils.ties), so rules
+# tied up to rounding may be told apart by the former only. No such tie
+# is met with these data sets (see test_ties for the ones that are)
+SEEDS = [0, 1, 3]
+ROUNDS = 15
+
+# Folds (rows, seed) of other sizes: in the first three a vectorized
+# booster meets rules tied up to rounding (dboost, dboost and slipper)
+TIES = [(48, 19), (60, 14), (100, 13), (60, 0), (60, 1)]
+
+# Rules of a model: (itemset id, class, confidence, alpha) and the class
+# and confidence outside the support of partition rules
+def rules(model):
+	return [(h.itemset.id, h.pred, round(h.conf, 9), round(alpha, 9),
+		getattr(h, "pred_", None), round(getattr(h, "conf_", 0.0), 9)) for h, alpha in model]
+
+# Model of a vectorized booster and the positions it took as tied in each
+# round (module: where it finds utils.ties)
+def recorded(module, alg, *args):
+	rounds = []
+	def ties(values, best):
+		rounds.append(utils.ties(values, best))
+		return rounds[-1]
+
+	module.ties = ties
+	try: return alg(*args), rounds
+	finally: module.ties = utils.ties
+
+''' Class BoostingTest '''
+
+# Vectorized boosters against the dict-based ones
+class BoostingTest(unittest.TestCase):
+
+	#
+	def setUp(self):
+		self.folds = []
+		for seed in SEEDS:
+			rows = data.rows(seed)
+			train = data.train_of(rows)
+			self.folds.append((train, reader.read_itemsets(data.itemsets_of(rows), train, data.CLASSES)))
+
+	# SLIPPER and its Jaccard (weights) and extra variants
+	def test_slipper(self):
+		for train, itemsets in self.folds:
+			weights = {key: 0.5 + int(key) % 3 / 4.0 for key in train}
+			extra = {data.CLASSES[0]: 3, data.CLASSES[1]: 1}
+
+			for weights_, extra_ in ((None, None), (weights, None), (None, extra), (weights, extra)):
+				model = slipper.slipper(itemsets, train, data.CLASSES, ROUNDS, weights_ and weights_.copy(), extra_)
+				model_ = slipper.vslipper(itemsets, train, data.CLASSES, ROUNDS, weights_ and weights_.copy(), extra_)
+
+				self.assertEqual(rules(model), rules(model_))
+
+	# SLIPPER variants trained at once over a shared index, against each
+	# variant trained alone
+	def test_slippers(self):
+		for train, itemsets in self.folds:
+			weights = {key: 0.5 + int(key) % 3 / 4.0 for key in train}
+			extra = {data.CLASSES[0]: 3, data.CLASSES[1]: 1}
+			variants = [(None, None), (weights, None), (None, extra), (weights, extra)]
+
+			for bnb in (False, True):
+				models = slipper.vslippers(itemsets, train, data.CLASSES, ROUNDS, variants, bnb)
+
+				for model, (weights_, extra_) in zip(models, variants):
+					model_ = slipper.vslipper(itemsets, train, data.CLASSES, ROUNDS, weights_ and weights_.copy(), extra_, bnb)
+					self.assertEqual(rules(model), rules(model_))
+
+	# Confidence-rated boosting: its three confidence functions (and no
+	# other one)
+	def test_cboost(self):
+		for train, itemsets in self.folds:
+			for alg, confidence in ((cboost.cboost, "margin"), (cboost.cboost2, "ratio"), (cboost.cboost3, "static")):
+				model = alg(itemsets, train, data.CLASSES, ROUNDS)
+				model_ = cboost.vcboost(itemsets, train, data.CLASSES, ROUNDS, confidence)
+
+				self.assertEqual(rules(model), rules(model_))
+
+			self.assertRaises(ValueError, cboost.vcboost, itemsets, train, data.CLASSES, ROUNDS, "margn")
+
+	# Discrete boosting
+	def test_dboost(self):
+		for train, itemsets in self.folds:
+			model = dboost.dboost(itemsets, train, data.CLASSES, ROUNDS)
+			model_ = dboost.vdboost(itemsets, train, data.CLASSES, ROUNDS)
+
+			self.assertEqual(rules(model), rules(model_))
+
+	# Folds of other sizes: the models are the same up to the first round
+	# with rules tied up to rounding, where the dict-based loop takes one
+	# of the rules the vectorized booster took as tied
+	def test_ties(self):
+		boosters = [(slipper, slipper.slipper, slipper.vslipper), (dboost, dboost.dboost, dboost.vdboost),
+			(cboost, cboost.cboost, functools.partial(cboost.vcboost, confidence="margin")),
+			(cboost, cboost.cboost2, functools.partial(cboost.vcboost, confidence="ratio")),
+			(cboost, cboost.cboost3, functools.partial(cboost.vcboost, confidence="static"))]
+		differ = 0
+
+		for n, seed in TIES:
+			rows = data.rows(seed, n)
+			train = data.train_of(rows)
+			itemsets = reader.read_itemsets(data.itemsets_of(rows), train, data.CLASSES)
+
+			for module, alg, valg in boosters:
+				model = rules(alg(itemsets, train, data.CLASSES, 25))
+				model_, rounds = recorded(module, valg, itemsets, train, data.CLASSES, 25)
+				model_ = rules(model_)
+				if model == model_: continue
+
+				differ += 1
+				t = min([t for t, chosen in enumerate(rounds) if len(chosen) > 1] + [len(rounds)])
+
+				self.assertTrue(t < len(model))
+				self.assertEqual(model[:t], model_[:t])
+				self.assertIn(model[t][0], [itemsets[c].id for c in rounds[t]])
+
+		self.assertEqual(differ, 3)
+
+	# Bounded search against the exhaustive one: same rules, some rows
+	# skipped and, on a larger indexed fold (22441 itemsets), no slower
+	# (about a fifth faster here)
+	def test_bnb(self):
+		for train, itemsets in self.folds:
+			stats = {}
+			model = slipper.vslipper(itemsets, train, data.CLASSES, ROUNDS)
+			model_ = slipper.vslipper(itemsets, train, data.CLASSES, ROUNDS, bnb=True, stats=stats)
+
+			self.assertEqual(rules(model), rules(model_))
+			self.assertEqual(stats["skipped"] + stats["evaluated"], ROUNDS * len(itemsets))
+			self.assertTrue(stats["skipped"] > 0)
+
+		rows = data.rows(1, 512, 9, 4)
+		train = dataset_of(data.train_of(rows), data.CLASSES)
+		itemsets = reader.read_itemsets(data.itemsets_of(rows, 2), train, data.CLASSES)
+
+		# Runs of both searches in turn, the fastest of each kept
+		models, times = {}, {False: [], True: []}
+		for run in xrange(5):
+			for bnb in (False, True):
+				start = time.time()
+				models[bnb] = rules(slipper.vslipper(itemsets, train, data.CLASSES, 100, bnb=bnb))
+				times[bnb].append(time.time() - start)
+
+		self.assertEqual(models[False], models[True])
+		self.assertTrue(min(times[True]) <= 1.1 * min(times[False]))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,50 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+# Imports
+import os
+import shutil
+import tempfile
+import unittest
+
+# Local imports
+import utils.parallel as parallel
+from utils.cache import Cache
+
+''' Class CacheTest '''
+
+# Entries of a pool's workers stored by the parent under the disk budget
+class CacheTest(unittest.TestCase):
+
+	#
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+
+	#
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	# Workers put entries past the disk budget (nothing kept in memory):
+	# none reaches the disk until the parent stores them
+	def test_workers(self):
+		cache = Cache(0, 1000, self.directory)
+
+		def work(i):
+			cache.added = []
+			cache.put("itemsets", str(i), "a" * 300)
+			return cache.added
+
+		results = parallel.pmap(work, [(i,) for i in xrange(8)], 4)
+		self.assertEqual(os.listdir(self.directory), [])
+
+		for added in results:
+			for kind, key, value in added: cache.put(kind, key, value)
+
+		sizes = [os.path.getsize(os.path.join(self.directory, name)) for name in os.listdir(self.directory)]
+		self.assertEqual(sum(sizes), cache.stored)
+		self.assertTrue(0 < cache.stored <= 1000)
+		self.assertEqual(cache.get("itemsets", "7"), "a" * 300)
+
+if __name__ == "__main__":
+	unittest.main()
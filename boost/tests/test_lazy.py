@@ -0,0 +1,173 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+# Imports
+import os
+import sys
+import glob
+import shutil
+import tempfile
+import unittest
+import subprocess
+import StringIO
+
+# Local imports
+import lazy
+import utils.settings as settings
+from core.miner import ClosedMiner
+import data
+
+# Projection of the former runner.sh lazy mode (sed deletes the test's
+# row): prefix holds "NR f,f,f", prefix.class.<class> the NRs and
+# prefix.jc the Jaccard's indexes
+AWK = '''
+BEGIN {
+	n = split(object, tmp);
+	for (i = 1; i <= n; ++i)
+		attributes[tmp[i]] = ""
+}{
+	empty = "t";
+	intersection = 0
+
+	for (i = 1; i != NF; ++i) {
+		if ($i in attributes) {
+			if (empty == "")
+				printf "," $i >> prefix;
+			else {
+				empty = "";
+				printf NR " " $i >> prefix
+			}
+
+			intersection++
+		}
+	};
+
+	if (empty == "") {
+		print "" >> prefix;
+		print NR >> prefix ".class." $NF
+
+		union = n + NF - intersection - 1
+		print NR " " intersection/union >> prefix ".jc"
+	}
+}'''
+
+''' Class LazyTest '''
+
+# The lazy mode's in-process paths against the former ones
+class LazyTest(unittest.TestCase):
+
+	#
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.paths = data.write(self.directory, data.rows(1), data.rows(2, 16))
+		self.processes = settings.PROCESSES
+
+	#
+	def tearDown(self):
+		settings.PROCESSES = self.processes
+		shutil.rmtree(self.directory)
+
+	# Predictions of lazy.py with the native miner (the cache's rates go
+	# to stderr, kept in self.stderr)
+	def run_(self, *argv):
+		args = lazy.arg_parsing(["-s", self.paths["train"], "-t", self.paths["test"], "-n", "-b", "10"] + list(argv))
+		out = StringIO.StringIO()
+
+		stderr, sys.stderr = sys.stderr, StringIO.StringIO()
+		try: lazy.run(args, out)
+		finally: self.stderr, sys.stderr = sys.stderr.getvalue(), stderr
+
+		return out.getvalue()
+
+	# Projection printed by awk: [(NR, features, class, Jaccard's index)]
+	def awk(self, features, deleted):
+		prefix = os.path.join(self.directory, "projection")
+		for file in glob.glob(prefix + "*"): os.unlink(file)
+
+		sed = subprocess.Popen(["sed", "%dd" % (deleted + 1), self.paths["train"]], stdout=subprocess.PIPE)
+		subprocess.check_call(["awk", "-v", "prefix=" + prefix, "-v", "object=" + " ".join(features), AWK], stdin=sed.stdout)
+		sed.wait()
+
+		if not os.path.exists(prefix): return []
+
+		classes = {}
+		for file in glob.glob(prefix + ".class.*"):
+			for nr in open(file): classes[int(nr)] = int(file[file.rfind(".") + 1:])
+
+		jaccard = dict((int(nr), float(index)) for nr, index in (line.split() for line in open(prefix + ".jc")))
+		rows = [line.split() for line in open(prefix)]
+
+		return [(int(nr), features.split(","), classes[int(nr)], jaccard[int(nr)]) for nr, features in rows]
+
+	# Projections of the test instances, their rows left out
+	def test_projection(self):
+		projector = lazy.Projector(self.paths["train"])
+
+		for row, line in enumerate(open(self.paths["test"])):
+			features = line.split()[:-1]
+			self.assertEqual(projector.project(features, row), self.awk(features, row))
+
+	# Models cached on the disk by a first run (and moved there by a small
+	# memory budget) predict as the ones trained without a cache
+	def test_cache(self):
+		expected = self.run_("-ZADCS", "--cache-memory", "0")
+
+		for memory in ("64", "0.001"):
+			directory = os.path.join(self.directory, "cache." + memory)
+
+			self.assertEqual(self.run_("-ZADCS", "--cache-memory", memory, "--cache-dir", directory), expected)
+			self.assertTrue(len(os.listdir(directory)) > 0)
+			self.assertEqual(self.run_("-ZADCS", "--cache-memory", memory, "--cache-dir", directory), expected)
+
+	# Duplicated test instances whose rows left out are equal (the training
+	# set is repeated) share their models, which are the ones trained for
+	# the same instances at other positions
+	def test_duplicates(self):
+		self.paths = data.write(self.directory, data.rows(1) + data.rows(1), data.rows(2) + data.rows(2, 16))
+		output = self.run_("-ZADCS", "--processes", "1").splitlines()
+
+		self.assertTrue(int(self.stderr.split("models: ")[1].split()[0]) >= 16)
+		self.assertEqual(output[64:], output[:16])
+
+		self.paths = data.write(self.directory, data.rows(1) + data.rows(1), data.rows(3) + data.rows(2, 16))
+		self.assertEqual(self.run_("-ZADCS", "--processes", "1").splitlines()[64:], output[:16])
+
+	# Test instances classified by a pool of processes or in turn, mining
+	# each projection or filtering the global itemsets
+	def test_processes(self):
+		for argv in ([], ["-g"]):
+			self.assertEqual(self.run_("-ZADCS", "--processes", "1", *argv), self.run_("-ZADCS", "--processes", "3", *argv))
+
+	# Global itemsets filtered for each test instance against the closed
+	# itemsets of its projection: (NRs of the support, features)
+	def test_global(self):
+		projector = lazy.Projector(self.paths["train"])
+
+		for minimum in (1, 3):
+			mined = lazy.GlobalItemsets(projector, lazy.native_patterns(projector.whole(), minimum), minimum)
+
+			for row, line in enumerate(open(self.paths["test"])):
+				features = line.split()[:-1]
+				projection = projector.project(features, row)
+
+				miner = ClosedMiner([[int(f) for f in features_] for nr, features_, class_, index in projection], minimum)
+				expected = set((frozenset(projection[r][0] for r in rows), frozenset(str(f) for f in features_))
+					for features_, rows in miner)
+
+				itemsets = [itemset.split() for itemset in mined.project(features, row)]
+				self.assertEqual(len(itemsets), len(expected))
+				self.assertEqual(set((frozenset(int(nr) for nr in support.split(",")), frozenset(features_.split(",")))
+					for support, features_ in itemsets), expected)
+
+	# Compressed training and testing files read as the plain ones
+	def test_compressed(self):
+		expected = self.run_("-ZADCS")
+		paths = self.paths
+
+		for extension in (".gz", ".bz2"):
+			self.paths = dict(paths, train=data.compress(paths["train"], extension), test=data.compress(paths["test"], extension))
+			self.assertEqual(self.run_("-ZADCS"), expected)
+
+if __name__ == "__main__":
+	unittest.main()
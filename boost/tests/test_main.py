@@ -0,0 +1,136 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+# Imports
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+import StringIO
+
+# Local imports
+import main
+import utils.reader as reader
+import utils.server as server
+import utils.settings as settings
+import data
+
+# Rules of the boosted models (name, [(itemset id, class, confidence, alpha)])
+def rules(models):
+	return [(name, [(h.itemset.id, h.pred, round(h.conf, 9), round(alpha, 9)) for h, alpha in model])
+		for model, name, ppr, average in models if isinstance(model, list)]
+
+''' Class MainTest '''
+
+# Models and predictions of main.py's paths against the dict mode's
+class MainTest(unittest.TestCase):
+
+	#
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.paths = data.write(self.directory, data.rows(1), data.rows(2, 16))
+
+	#
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	# Arguments of main.py for the fold and some more
+	def args(self, *argv):
+		return main.arg_parsing(["-s"] + self.paths["classes"] + ["-t", self.paths["test"], "-b", "10"] + list(argv))
+
+	# Predictions of main.py
+	def run_(self, *argv):
+		out = StringIO.StringIO()
+		main.run(self.args(*argv), out)
+
+		return out.getvalue()
+
+	# Models trained by main.py on the fold's itemsets
+	def fit(self, *argv):
+		args = self.args(*argv)
+		train, classes, sizes = reader.read_train(args.s, args.index)
+		itemsets = reader.read_itemsets(self.paths["itemsets"], train, classes)
+
+		return main.fit(args, train, classes, sizes, itemsets)[0]
+
+	# Every model but the internal cross-validation's (its folds are
+	# shuffled from the keys, which are ids in the indexed mode)
+	def test_index(self):
+		self.assertEqual(rules(self.fit("-i", "-", "-ZADCS")), rules(self.fit("-i", "-", "-ZADCS", "--index")))
+		self.assertEqual(self.run_("-i", self.paths["itemsets"], "-ZADCS"),
+			self.run_("-i", self.paths["itemsets"], "-ZADCS", "--index"))
+
+	# Branch-and-bound searches, which need the indexed mode (their
+	# statistics and argparse's usage go to stderr)
+	def test_bnb(self):
+		stderr, sys.stderr = sys.stderr, StringIO.StringIO()
+		try:
+			self.assertEqual(rules(self.fit("-i", "-", "-DS", "--index")), rules(self.fit("-i", "-", "-DS", "--index", "--bnb")))
+			self.assertRaises(SystemExit, self.args, "-i", "-", "--bnb")
+		finally: sys.stderr = stderr
+
+	# Saved models (plain and compressed) predict as the trained ones
+	def test_save(self):
+		for name in ("models.json", "models.json.gz"):
+			file = os.path.join(self.directory, name)
+
+			self.assertEqual(self.run_("-i", self.paths["itemsets"], "-ZADCS", "-c", "--save", file),
+				self.run_("--load", file))
+
+	# Jobs served from a stream: the itemsets as a file or as the job's
+	# input, an argument error and the settings restored after each job
+	def test_serve(self):
+		argv = ["-s"] + self.paths["classes"] + ["-t", self.paths["test"], "-b", "7", "-ZADCS"]
+		with open(self.paths["itemsets"]) as handler: itemsets = handler.read()
+
+		requests = [{"id": 1, "args": argv + ["-i", self.paths["itemsets"]]},
+			{"id": 2, "args": argv + ["-i", "-"], "input": itemsets},
+			{"id": 3, "args": argv + ["--bnb", "-i", "-"], "input": itemsets}]
+
+		instream = StringIO.StringIO("".join(json.dumps(request) + "\n" for request in requests))
+		outstream = StringIO.StringIO()
+		rounds = settings.MAX_ROUNDS
+
+		stderr, sys.stderr = sys.stderr, StringIO.StringIO()
+		try: server.serve_stream(main.job, instream, outstream)
+		finally: sys.stderr = stderr
+
+		self.assertEqual(settings.MAX_ROUNDS, rounds)
+
+		answers = [json.loads(line) for line in outstream.getvalue().splitlines()]
+		expected = self.run_("-i", self.paths["itemsets"], "-ZADCS", "-b", "7")
+
+		self.assertEqual([answer["id"] for answer in answers], [1, 2, 3])
+		self.assertEqual([answer["ok"] for answer in answers], [True, True, False])
+		self.assertEqual([answer["output"] for answer in answers[:2]], [expected, expected])
+
+	# Itemsets cache: written by a first run, read by the next ones, in
+	# both reader modes
+	def test_icache(self):
+		for argv in ([], ["--index"]):
+			file = os.path.join(self.directory, "itemsets%s.bin" % "".join(argv))
+			expected = self.run_("-i", self.paths["itemsets"], "-ZADCS", *argv)
+
+			self.assertEqual(self.run_("-i", self.paths["itemsets"], "-ZADCS", "--icache", file, *argv), expected)
+			self.assertTrue(os.path.exists(file))
+			self.assertEqual(self.run_("-i", self.paths["itemsets"], "-ZADCS", "--icache", file, *argv), expected)
+			self.assertEqual(self.run_("-ZADCS", "--icache", file, *argv), expected)
+
+	# Compressed class, testing and itemsets files read as the plain ones
+	def test_compressed(self):
+		expected = self.run_("-i", self.paths["itemsets"], "-ZADCS")
+
+		for extension in (".gz", ".bz2"):
+			classes = [data.compress(file, extension) for file in self.paths["classes"]]
+			argv = ["-s"] + classes + ["-t", data.compress(self.paths["test"], extension), "-b", "10",
+				"-i", data.compress(self.paths["itemsets"], extension), "-ZADCS"]
+
+			out = StringIO.StringIO()
+			main.run(main.arg_parsing(argv), out)
+			self.assertEqual(out.getvalue(), expected)
+
+if __name__ == "__main__":
+	unittest.main()
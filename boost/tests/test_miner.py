@@ -0,0 +1,54 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+# Imports
+import random
+import unittest
+
+# Local imports
+from core.miner import ClosedMiner
+import data
+
+# Closed itemsets by brute force: the non-empty intersections of the
+# transactions, with the rows that hold them. {(features, rows)}
+def closed(transactions, minimum=1):
+	intersections = set()
+	for t in transactions:
+		t = frozenset(t)
+		intersections |= set(t & i for i in intersections) | set([t])
+
+	itemsets = set()
+	for i in intersections:
+		rows = frozenset(r for r, t in enumerate(transactions) if i.issubset(t))
+		if len(i) > 0 and len(rows) >= minimum: itemsets.add((i, rows))
+
+	return itemsets
+
+''' Class MinerTest '''
+
+# The native miner against brute force
+class MinerTest(unittest.TestCase):
+
+	# Transactions of the data sets and random ones of any size (repeated
+	# and empty ones too)
+	def setUp(self):
+		generator = random.Random(1)
+
+		self.transactions = [[[int(f) for f in features] for key, features, class_ in data.rows(seed, 32)] for seed in (1, 2)]
+		for n in (1, 5, 40):
+			transactions = [generator.sample(xrange(1, 13), generator.randrange(6)) for r in xrange(n)]
+			self.transactions.append(transactions + transactions[:n / 4])
+
+	# Every closed itemset once, for some minimum supports
+	def test_closed(self):
+		for transactions in self.transactions:
+			for minimum in (0, 1, 2, 5):
+				itemsets = [(frozenset(features.tolist()), frozenset(rows.tolist()))
+					for features, rows in ClosedMiner(transactions, minimum)]
+
+				self.assertEqual(len(itemsets), len(set(itemsets)))
+				self.assertEqual(set(itemsets), closed(transactions, minimum))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,154 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+# Imports
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+# Local imports
+import utils.reader as reader
+import utils.writer as writer
+import utils.settings as settings
+import data
+
+''' Class ReaderTest '''
+
+# The indexed reader mode against the dict mode
+class ReaderTest(unittest.TestCase):
+
+	#
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.rows = data.rows(1)
+		self.paths = data.write(self.directory, self.rows, data.rows(2, 16))
+
+	#
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	# Supports of itemsets as {class: sorted keys}
+	def supports(self, itemsets, train):
+		names = train.names if hasattr(train, "names") else None
+		return [{class_: sorted(names[i] if names is not None else i for i in it.supp[class_]) for class_ in it.supp}
+			for it in itemsets]
+
+	# Ids, patterns and supports of itemsets
+	def contents(self, itemsets, train):
+		patterns = [[sorted(p) for p in it.patterns if p is not None] for it in itemsets]
+		return zip([it.id for it in itemsets], patterns, self.supports(itemsets, train))
+
+	# Same instances, classes, sizes and supports in both modes
+	def test_index(self):
+		train, classes, sizes = reader.read_train(self.paths["classes"])
+		dataset, classes_, sizes_ = reader.read_train(self.paths["classes"], True)
+
+		self.assertEqual((classes, sizes), (classes_, sizes_))
+		self.assertEqual(train, {name: dataset[i] for i, name in enumerate(dataset.names)})
+
+		itemsets = reader.read_itemsets(self.paths["itemsets"], train, classes)
+		itemsets_ = reader.read_itemsets(self.paths["itemsets"], dataset, classes)
+		self.assertEqual(self.supports(itemsets, train), self.supports(itemsets_, dataset))
+
+	# A repeated instance keeps its first id and its last class, as the
+	# dict keeps its key and last value. Sizes count every line
+	def test_repeated(self):
+		key, features, class_ = self.rows[0]
+		with open(self.paths["classes"][data.CLASSES.index(class_) - 1], "a") as handler: handler.write(key + "\n")
+
+		train, classes, sizes = reader.read_train(self.paths["classes"])
+		dataset, classes_, sizes_ = reader.read_train(self.paths["classes"], True)
+
+		self.assertEqual(sizes, sizes_)
+		self.assertEqual(len(train), len(dataset))
+		self.assertEqual(train, {name: dataset[i] for i, name in enumerate(dataset.names)})
+
+	# Itemsets streamed from a miner's output (a generator of lines) as
+	# read from its file: D-peeler's, with free itemsets too, and LCM's
+	# (f f f <new line> 0-based rows), in both modes
+	def test_stream(self):
+		train, classes, sizes = reader.read_train(self.paths["classes"])
+		dataset = reader.read_train(self.paths["classes"], True)[0]
+
+		lcm = os.path.join(self.directory, "itemsets.lcm")
+		with open(lcm, "w") as handler:
+			for line in open(self.paths["itemsets"]):
+				support, features = line.split()
+				handler.write(features.replace(",", " ") + "\n")
+				handler.write(" ".join(str(int(key) - 1) for key in support.split(",")) + "\n")
+
+		for train_ in (train, dataset):
+			for file, mode, free in ((self.paths["itemsets"], None, False), (self.paths["itemsets"], None, True), (lcm, "lcm", False)):
+				itemsets = reader.read_itemsets(file, train_, classes, mode, free)
+				itemsets_ = reader.read_itemsets((line for line in open(file)), train_, classes, mode, free)
+
+				self.assertEqual(self.contents(itemsets, train_), self.contents(itemsets_, train_))
+
+	# Itemsets written to a binary cache and read back: same contents, and
+	# in dict mode supports iterating in the same order. A cache of another
+	# training set or reader mode is not read
+	def test_binary(self):
+		train, classes, sizes = reader.read_train(self.paths["classes"])
+		dataset = reader.read_train(self.paths["classes"], True)[0]
+		file = os.path.join(self.directory, "itemsets.bin")
+
+		for train_ in (train, dataset):
+			for free in (False, True):
+				orders = [] if train_ is train else None
+				itemsets = reader.read_itemsets(self.paths["itemsets"], train_, classes, free=free, orders=orders)
+
+				writer.write_itemsets(file, itemsets, train_, classes, None, free, orders)
+				itemsets_ = reader.read_binary_itemsets(file, train_, classes, None, free)
+
+				self.assertEqual(self.contents(itemsets, train_), self.contents(itemsets_, train_))
+				if train_ is train:
+					self.assertEqual([[list(it.supp[class_]) for class_ in classes] for it in itemsets],
+						[[list(it.supp[class_]) for class_ in classes] for it in itemsets_])
+
+				self.assertEqual(reader.read_binary_itemsets(file, train_, classes, "lcm", free), None)
+				self.assertEqual(reader.read_binary_itemsets(file, train_, classes, None, not free), None)
+
+		train_ = dict(train)
+		del train_[self.rows[0][0]]
+		self.assertEqual(reader.read_binary_itemsets(file, train_, classes), None)
+
+	# Itemsets parsed in small chunks by a pool against the ones parsed
+	# line by line: supports printed in any order, patterns appended to
+	# the last support (also across chunks) and the empty pattern
+	def test_chunked(self):
+		train, classes, sizes = reader.read_train(self.paths["classes"])
+		dataset = reader.read_train(self.paths["classes"], True)[0]
+
+		generator = random.Random(1)
+		file = os.path.join(self.directory, "itemsets.shuffled")
+
+		with open(file, "w") as handler:
+			handler.write(",".join(key for key, features, class_ in self.rows) + " \xc3\xb8\n")
+			for line in open(self.paths["itemsets"]):
+				support, features = line.split()
+				support = support.split(",")
+				generator.shuffle(support)
+
+				handler.write(",".join(support) + " " + features + "\n")
+				if generator.random() < 0.3: handler.write(",".join(support) + " " + features.split(",")[0] + "\n")
+
+		chunk, processes = settings.PARSE_CHUNK, settings.PROCESSES
+		settings.PARSE_CHUNK, settings.PROCESSES = 256, 3
+
+		try:
+			for train_ in (train, dataset):
+				for free in (False, True):
+					orders, orders_ = ([], []) if train_ is train else (None, None)
+					itemsets = reader.read_itemsets((line for line in open(file)), train_, classes, None, free, orders=orders)
+					itemsets_ = reader.read_itemsets(file, train_, classes, None, free, orders=orders_)
+
+					self.assertEqual(self.contents(itemsets, train_), self.contents(itemsets_, train_))
+					self.assertEqual([it.isdefault() for it in itemsets], [it.isdefault() for it in itemsets_])
+					self.assertEqual(orders, orders_)
+		finally: settings.PARSE_CHUNK, settings.PROCESSES = chunk, processes
+
+if __name__ == "__main__":
+	unittest.main()
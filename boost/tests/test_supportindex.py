@@ -0,0 +1,60 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+# Imports
+import unittest
+import numpy
+
+# Local imports
+import utils.reader as reader
+from core.dataset import dataset_of
+from core.supportindex import SupportIndex, SupportIndexBuilder, index_of
+import data
+
+''' Class SupportIndexTest '''
+
+# Support index rows against the itemsets' support sets
+class SupportIndexTest(unittest.TestCase):
+
+	#
+	def setUp(self):
+		rows = data.rows(1)
+		self.train = data.train_of(rows)
+		self.itemsets = reader.read_itemsets(data.itemsets_of(rows), self.train, data.CLASSES)
+		self.dataset = dataset_of(self.train, data.CLASSES)
+
+	# Rows: per class supports, sizes and weighted supports
+	def test_rows(self):
+		index = index_of(self.itemsets, self.dataset)
+		weights = numpy.arange(1, len(self.dataset) + 1, dtype=float)
+		weighted = index.weighted(weights)
+
+		self.assertEqual(len(index), len(self.itemsets))
+		for r, it in enumerate(self.itemsets):
+			support = index.support(r)
+			for k, class_ in enumerate(self.dataset.classes):
+				keys = set(self.dataset.names[i] for i in support[class_])
+
+				self.assertEqual(keys, it.supp[class_])
+				self.assertEqual(index.sizes()[r, k], len(it.supp[class_]))
+				self.assertEqual(weighted[r, k], sum(weights[self.dataset.ids[key]] for key in it.supp[class_]))
+
+	# Rows given in blocks, with repeated ids: the index SupportIndex builds
+	def test_builder(self):
+		SupportIndexBuilder.BLOCK, block = 16, SupportIndexBuilder.BLOCK
+		try:
+			builder = SupportIndexBuilder(self.dataset)
+			rows = [[self.dataset.ids[key] for class_ in it.supp for key in it.supp[class_]] for it in self.itemsets]
+			for row in rows: builder.add(row + row[:2])
+
+			index = builder.build()
+		finally: SupportIndexBuilder.BLOCK = block
+
+		expected = SupportIndex(self.dataset, index.indptr, index.indices)
+		for r, row in enumerate(rows): self.assertEqual(sorted(index.row(r)), sorted(set(row)))
+		self.assertTrue((index.classptr == expected.classptr).all())
+		self.assertTrue((index.segments == expected.segments).all())
+
+if __name__ == "__main__":
+	unittest.main()
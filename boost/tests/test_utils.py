@@ -0,0 +1,89 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+# Imports
+import functools
+import unittest
+
+# Local imports
+import utils.utils as utils
+import utils.reader as reader
+import algs.slipper as slipper
+import algs.cboost as cboost
+import algs.lac as lac
+from core.instance import Instance
+from core.coverage import BitmapCoverage
+import data
+
+''' Class UtilsTest '''
+
+# Parallel and batch paths of utils against sequential ones
+class UtilsTest(unittest.TestCase):
+
+	#
+	def setUp(self):
+		rows = data.rows(1)
+		self.train = data.train_of(rows)
+		self.itemsets = reader.read_itemsets(data.itemsets_of(rows), self.train, data.CLASSES)
+
+		# Test instances and boosted models (rules and partition rules)
+		self.tests = [Instance(i, set(int(f) for f in features), class_)
+			for i, (key, features, class_) in enumerate(data.rows(2, 16))]
+		self.models = [slipper.slipper(self.itemsets, self.train, data.CLASSES, 15),
+			cboost.cboost(self.itemsets, self.train, data.CLASSES, 15)]
+
+	# Predictions of prediction() for each test instance (None: default)
+	def predictions(self, model, default, print_per_round, average):
+		return [[default if p is None else p for p in utils.prediction(model, inst, print_per_round, average)]
+			for inst in self.tests]
+
+	# Internal cross-validation: folds trained by a pool or in turn
+	def test_internalcv(self):
+		for alg in (slipper.slipper, functools.partial(slipper.vslipper, bnb=True)):
+			self.assertEqual(utils.internalcv(self.itemsets, self.train, data.CLASSES, alg, processes=1),
+				utils.internalcv(self.itemsets, self.train, data.CLASSES, alg, processes=3))
+
+	# Batch predictions: every round or the last one, summed or averaged
+	def test_predictions(self):
+		for model in self.models:
+			for print_per_round in (True, False):
+				for average in (False, True):
+					self.assertEqual(utils.predictions(model, self.tests, data.CLASSES[0], print_per_round, average).tolist(),
+						self.predictions(model, data.CLASSES[0], print_per_round, average))
+
+	# Final sums with the early exit: same predictions, and some rules of
+	# the models are left unscored
+	def test_exited(self):
+		skipped = 0
+		for model in self.models:
+			stats = {}
+			self.assertEqual(utils.predictions(model, self.tests, data.CLASSES[0], False, False, stats=stats).tolist(),
+				self.predictions(model, data.CLASSES[0], False, False))
+
+			skipped += stats["skipped"]
+
+		self.assertTrue(skipped > 0)
+
+	# Compiled LAC against its rules, as main.py predicts with it
+	def test_clac(self):
+		model = lac.clac(self.itemsets, data.CLASSES)
+		self.assertEqual(utils.predictions(model, self.tests, data.CLASSES[0], False, True).tolist(),
+			self.predictions(lac.lac(self.itemsets, data.CLASSES), data.CLASSES[0], False, True))
+
+	# Bitmap-compiled coverage of the models' rules (small blocks) against
+	# subset tests, and the predictions made with it
+	def test_bitmaps(self):
+		BitmapCoverage.CHUNK, chunk = 64, BitmapCoverage.CHUNK
+		try: coverage = BitmapCoverage([h.itemset for model in self.models for h, alpha in model], self.tests)
+		finally: BitmapCoverage.CHUNK = chunk
+
+		for it in self.itemsets:
+			self.assertEqual(coverage(it).tolist(), [it.isdefault() or it.issubset(inst.features) for inst in self.tests])
+
+		for model in self.models:
+			self.assertEqual(utils.predictions(model, self.tests, data.CLASSES[0], True, False, coverage).tolist(),
+				self.predictions(model, data.CLASSES[0], True, False))
+
+if __name__ == "__main__":
+	unittest.main()
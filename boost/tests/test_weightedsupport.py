@@ -0,0 +1,74 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+# Imports
+import random
+import unittest
+import numpy
+
+# Local imports
+import utils.reader as reader
+from core.dataset import dataset_of
+from core.supportindex import index_of
+from core.weightedsupport import WeightedSupport
+from core.distribution import Distribution
+import data
+
+''' Class WeightedSupportTest '''
+
+# Lazily normalized weights and incrementally updated weighted supports
+# against the ones of an eager normalization and of a recount
+class WeightedSupportTest(unittest.TestCase):
+
+	#
+	def setUp(self):
+		rows = data.rows(1)
+		train = data.train_of(rows)
+		itemsets = reader.read_itemsets(data.itemsets_of(rows), train, data.CLASSES)
+
+		self.dataset = dataset_of(train, data.CLASSES)
+		self.index = index_of(itemsets, self.dataset)
+		self.generator = random.Random(1)
+
+	# Updates on a few instances (deltas) and on many (recount)
+	def test_multiply(self):
+		support = WeightedSupport(self.index, numpy.repeat(1.0 / len(self.dataset), len(self.dataset)))
+
+		for size in (1, 3, 8, 40, 2, 64, 5):
+			ids = numpy.array(sorted(self.generator.sample(xrange(len(self.dataset)), size)), dtype=numpy.int32)
+			support.multiply(numpy.array([self.generator.uniform(0.2, 3.0) for i in ids]), ids)
+			support.normalize()
+
+			self.assertTrue(numpy.allclose(support.candidates()[1], self.index.weighted(support.weights())))
+
+	# Lazily normalized weights against weights normalized at every step,
+	# with extra class mass and raw sums grown past the folding range
+	def test_normalize(self):
+		codes, K = self.dataset.codes, len(self.dataset.classes)
+		weights = numpy.repeat(1.0, len(self.dataset))
+		extra = numpy.array([3.0, 1.0])
+
+		distribution = Distribution(codes, K, weights.copy(), extra)
+		steps = [("scale", numpy.array([2.0, 0.5])), ("multiply", 1e50), ("multiply", 1e50),
+			("scale", numpy.array([1e-40, 3.0])), ("multiply", 1e-30), ("multiply", 1e60), ("multiply", 0.25)]
+
+		for kind, factors in steps:
+			if kind == "scale":
+				distribution.scale(factors)
+				weights *= factors[codes]
+				extra *= factors
+			else:
+				ids = numpy.array(sorted(self.generator.sample(xrange(len(self.dataset)), 20)), dtype=numpy.int32)
+				distribution.multiply(numpy.repeat(factors, len(ids)), ids)
+				weights[ids] *= factors
+
+			normalizer = weights.sum() + extra.sum()
+			totals = (numpy.bincount(codes, weights=weights, minlength=K) + extra) / normalizer
+
+			self.assertTrue(distribution.normalize())
+			self.assertTrue(numpy.allclose(distribution.weights(), weights / normalizer, rtol=1e-9, atol=0))
+			self.assertTrue(numpy.allclose(distribution.totals(), totals, rtol=1e-9, atol=0))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,161 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+'''
+
+Description
+-----------
+Content-addressed cache of byte strings. Entries are keyed by a digest
+of their inputs and evicted in least recently used order: from memory
+to the disk (when a directory is given) and then out of the cache. The
+disk entries are files named after their keys, so they are shared by
+later runs using the same directory. Only the main process writes the
+disk: forked workers hand their new entries back (see added)
+
+'''
+
+# Imports
+import os
+import hashlib
+import tempfile
+import collections
+import multiprocessing
+
+# Local imports
+import settings
+
+# Key of a content: digest of the repr of its parts
+def digest(*parts):
+	return hashlib.sha1(repr(parts)).hexdigest()
+
+''' Class Cache '''
+
+# LRU cache under memory and disk budgets (bytes)
+class Cache(object):
+
+	#
+	def __init__(self, memory=None, disk=None, directory=None):
+		self.memory = settings.CACHE_MEMORY if memory is None else memory
+		self.disk = settings.CACHE_DISK if disk is None else disk
+		self.directory = directory
+
+		# Entries by recency: key -> value (memory) or size (disk)
+		self.entries = collections.OrderedDict()
+		self.files = collections.OrderedDict()
+		self.used = 0
+		self.stored = 0
+
+		# Hits and misses per kind of entry
+		self.hits = collections.Counter()
+		self.misses = collections.Counter()
+
+		# New entries (kind, key, value), while it is a list
+		self.added = None
+
+		# Entries left by earlier runs, oldest first
+		if self.directory is not None:
+			if not os.path.isdir(self.directory): os.makedirs(self.directory)
+
+			names = [name for name in os.listdir(self.directory) if not name.startswith(".")]
+			paths = {name: os.path.join(self.directory, name) for name in names}
+
+			for name in sorted(names, key=lambda name: os.path.getmtime(paths[name])):
+				self.files[name] = os.path.getsize(paths[name])
+				self.stored += self.files[name]
+
+			self.shrink()
+
+	# Value of an entry (None if it is not cached)
+	def get(self, kind, key):
+		name = kind + "." + key
+
+		value = None
+		if name in self.entries:
+			value = self.entries.pop(name)
+			self.used -= len(value)
+		elif name in self.files:
+			try:
+				with open(self.path(name), "rb") as handler: value = handler.read()
+				os.utime(self.path(name), None)
+				self.files[name] = self.files.pop(name)
+
+			# Removed by another run
+			except (IOError, OSError):
+				self.stored -= self.files.pop(name)
+
+		if value is None:
+			self.misses[kind] += 1
+			return None
+
+		self.hits[kind] += 1
+		self.keep(name, value)
+
+		return value
+
+	# Caches an entry
+	def put(self, kind, key, value):
+		name = kind + "." + key
+		if name in self.entries: self.used -= len(self.entries.pop(name))
+		if self.added is not None: self.added.append((kind, key, value))
+
+		self.keep(name, value)
+
+	# Keeps an entry in memory, moving the least recently used ones out
+	def keep(self, name, value):
+		self.entries[name] = value
+		self.used += len(value)
+
+		while self.used > self.memory and len(self.entries) > 0:
+			name, value = self.entries.popitem(last=False)
+			self.used -= len(value)
+			self.store(name, value)
+
+	# Stores an entry on the disk (if there is room for it). Workers of a
+	# pool do not: their view of the directory is the one they were
+	# forked with, so they would go past the budget or remove new files
+	def store(self, name, value):
+		if self.directory is None or len(value) > self.disk: return
+		if multiprocessing.current_process().daemon: return
+
+		# Entries are content-addressed: a stored one is already up to date
+		if name in self.files:
+			self.files[name] = self.files.pop(name)
+			return
+
+		# Written aside and renamed: other runs never read partial entries
+		handle, temporary = tempfile.mkstemp(prefix=".", dir=self.directory)
+		with os.fdopen(handle, "wb") as handler: handler.write(value)
+		os.rename(temporary, self.path(name))
+
+		self.files[name] = len(value)
+		self.stored += len(value)
+
+		self.shrink()
+
+	# Stores the entries in memory on the disk (for later runs)
+	def flush(self):
+		for name, value in self.entries.items(): self.store(name, value)
+
+	# Removes the least recently used files over the disk budget
+	def shrink(self):
+		while self.stored > self.disk and len(self.files) > 0:
+			name, size = self.files.popitem(last=False)
+			self.stored -= size
+
+			try: os.unlink(self.path(name))
+			except OSError: pass # Removed by another run
+
+	# Path of a disk entry
+	def path(self, name):
+		return os.path.join(self.directory, name)
+
+	# Hit and miss rates per kind of entry
+	def report(self):
+		lines = []
+		for kind in sorted(set(self.hits) | set(self.misses)):
+			total = self.hits[kind] + self.misses[kind]
+			lines.append("# cache %s: %d hits, %d misses (%.1f%% hit rate)" %
+				(kind, self.hits[kind], self.misses[kind], 100.0 * self.hits[kind] / total))
+
+		return lines
@@ -0,0 +1,71 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+# Imports
+import contextlib
+import multiprocessing
+
+# Local imports
+import settings
+
+# Function run by the workers. It is inherited by the forked processes
+# along with everything it refers to (itemsets, training set, ...), so
+# only the task arguments and the results are pickled
+_function = None
+
+# Worker call
+def _call(args):
+	return _function(*args)
+
+# Number of worker processes (settings.PROCESSES, one per core if None)
+def processes(n=None):
+	if n is None: n = settings.PROCESSES
+	if n is None: n = multiprocessing.cpu_count()
+
+	return max(1, n)
+
+# Ordered map of function over a list of argument tuples in a process pool
+# Runs sequentially with a single process or inside a worker process
+def pmap(function, tasks, n=None):
+	global _function
+
+	n = min(processes(n), len(tasks))
+	if n <= 1 or multiprocessing.current_process().daemon:
+		return [function(*args) for args in tasks]
+
+	# Workers are forked after the function is set
+	_function = function
+	pool = multiprocessing.Pool(n)
+
+	try:
+		return pool.map(_call, tasks, chunksize=1)
+	finally:
+		pool.close()
+		pool.join()
+		_function = None
+
+# Ordered map of function over a list of argument tuples in a process pool,
+# as a context manager giving an iterator: results come, in order, as soon
+# as they are ready. The workers are shut down when the block is left,
+# even if the results were not all consumed (e.g. on errors)
+# Runs sequentially with a single process or inside a worker process
+@contextlib.contextmanager
+def pimap(function, tasks, n=None):
+	global _function
+
+	n = min(processes(n), len(tasks))
+	if n <= 1 or multiprocessing.current_process().daemon:
+		yield (function(*args) for args in tasks)
+		return
+
+	# Workers are forked after the function is set
+	_function = function
+	pool = multiprocessing.Pool(n)
+
+	try:
+		yield pool.imap(_call, tasks, chunksize=1)
+	finally:
+		pool.terminate()
+		pool.join()
+		_function = None
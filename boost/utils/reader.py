@@ -4,19 +4,74 @@
 # Contact: vauxgomes@gmail.com
 # Version: 0.1
 
+import io
+import os
+import bz2
+import mmap
+import gzip
+import json
+import struct
+import contextlib
+
+import numpy
+
+# Optional: xz inputs (backports.lzma on Python 2)
+try:
+	import lzma
+except ImportError:
+	try: from backports import lzma
+	except ImportError: lzma = None
+
 from core.itemset import Itemset
 from core.instance import Instance
+from core.dataset import Dataset
+from core.supportindex import SupportIndex, SupportIndexBuilder
+from core.ruleclassifier import RuleClassifier
+from core.partitionclassifier import PartitionClassifier
+from core.compiledlac import CompiledLAC
+from core.miner import ClosedMiner
+import settings
+import parallel
+
+from writer import MODELS_FORMAT, MODELS_VERSION, ITEMSETS_MAGIC, training_hash
+
+# Compression of an input file, by extension (None if it is not compressed)
+def compression(file):
+	for extension in (".gz", ".bz2", ".xz", ".lzma"):
+		if file.endswith(extension): return extension
+
+	return None
+
+# Opens an input file. Compressed files (gzip, bz2 and xz) are decompressed
+# as they are read, so pipes and devices (e.g. /dev/stdin) are read as is
+def open_input(file):
+	extension = compression(file)
+
+	if extension is None: return open(file, "r")
+	if extension == ".gz": return io.BufferedReader(gzip.open(file, "rb"))
+	if extension == ".bz2": return bz2.BZ2File(file, "r")
+
+	if lzma is None: raise ValueError("Reading " + file + " needs the lzma module (backports.lzma)")
+	return lzma.LZMAFile(file, "r")
 
 # Read training files (One per class)
-def read_train(files):
+# If index is True the instances are interned into a Dataset
+def read_train(files, index=False):
 	train = {}
 	sizes = {}
 	classes = []
+
+	# Indexed mode (repeated instances keep their first id and last class,
+	# as the dictionary keeps its key and last value)
+	names = []
+	labels = []
+	ids = {}
 	
 	for file in files:
-		with open(file, 'r') as handler:
-			# Class name selected from file name
-			class_ = int(file[file.rfind(".") + 1:])
+		with open_input(file) as handler:
+			# Class name selected from file name (without its compression)
+			name = file[:-len(compression(file))] if compression(file) is not None else file
+			class_ = int(name[name.rfind(".") + 1:])
 			classes.append(class_)
 			sizes[class_] = 0
 
@@ -25,16 +80,26 @@ def read_train(files):
 				if inst.find(" ") != -1:
 					inst = inst[inst.find(" ") + 1:].strip()
 
-				train[inst.strip()] = class_
+				if index and inst.strip() in ids:
+					labels[ids[inst.strip()]] = class_
+				elif index:
+					ids[inst.strip()] = len(names)
+					names.append(inst.strip())
+					labels.append(class_)
+				else:
+					train[inst.strip()] = class_
+				
 				sizes[class_] += 1
 
+	if index: train = Dataset(names, labels, classes)
+
 	return train, classes, sizes
 
 # Read test file LUCSKDD format
 def read_test(file):
 	instances = []
 
-	with open(file, 'r') as handler:
+	with open_input(file) as handler:
 		for inst in handler:
 			ft = [int(i) for i in inst.split()]
 			instances.append(Instance(len(instances), set(ft[:-1]), ft[-1]))
@@ -42,15 +107,72 @@ def read_test(file):
 	return instances
 
 
+# Lines of a file name or of an iterable of lines (e.g. a miner's output)
+@contextlib.contextmanager
+def lines_of(file):
+	if isinstance(file, basestring):
+		with open_input(file) as handler: yield handler
+	else: yield file
+
 # Read itemsets
-def read_itemsets(file, train, classes, mode=None, free=False):
-	last = "@vauxgomes"
+# The file may also be an iterable of lines. In the native mode they are
+# mined in process from the training file (see iter_mined_itemsets).
+# In dict mode, orders (a list) receives the support keys of each itemset
+# in the order they were read (see writer.write_itemsets)
+def read_itemsets(file, train, classes, mode=None, free=False, minimum=1, orders=None):
 	has_default = False
 	itemsets = []
 
+	# Indexed mode: supports are rows of a support index
+	indexed = isinstance(train, Dataset)
+	builder = SupportIndexBuilder(train) if indexed else None
+
+	# Large D-peeler/Multidupehack files are parsed by a process pool
+	if mode is None and isinstance(file, basestring) and os.path.isfile(file) and compression(file) is None \
+		and os.path.getsize(file) > settings.PARSE_CHUNK and parallel.processes() > 1:
+		source = iter_chunked_itemsets(file, train, classes, free, builder, orders)
+	elif mode == "native": source = iter_mined_itemsets(file, train, classes, minimum, builder, orders)
+	else: source = iter_itemsets(file, train, classes, mode, free, builder, orders)
+
+	for itemset in source:
+		itemsets.append(itemset)
+		if itemset.isdefault(): has_default = True
+
+	# Forcing a default itemset
+	if not has_default:
+		if indexed:
+			supp = None
+			builder.add(train.keys())
+		else:
+			supp = {class_:set() for class_ in classes}
+			for inst in train: supp[train[inst]].add(inst)
+			if orders is not None: orders.append(list(train))
+
+		itemsets.append(Itemset(-1, None, supp, default=True))
+
+	# Itemsets become views of the support index
+	if indexed:
+		index = builder.build()
+		for row, itemset in enumerate(itemsets): itemset.view(index, row)
+	
+	# print "@ itemsets", len(itemsets)
+	return itemsets
+
+# Itemsets of a file (see read_itemsets), yielded as the lines are read,
+# so a miner's output is parsed while it is printed. In indexed mode the
+# supports go to the builder (in order) and the itemsets have no support
+# until it is built. A multidupehack itemset is yielded once a row with
+# another support shows that no more patterns are appended to it
+def iter_itemsets(file, train, classes, mode=None, free=False, builder=None, orders=None):
+	last = "@vauxgomes"
+	itemset = None
+	count = 0
+
+	indexed = builder is not None
+
 	# Multidupehack or D-peeler
 	if mode is None: 
-		with open(file, "r") as handler:
+		with lines_of(file) as handler:
 			for row in handler:
 				# s,s,s f,f,f,f,f
 				row = row.strip().split()
@@ -58,43 +180,53 @@ def read_itemsets(file, train, classes, mode=None, free=False):
 				features = row[1].split(",") # f,f,f
 
 				# Warning: assuming the supports are printed in order
-				if support == last and not itemsets[-1].default:
+				if support == last and not itemset.default:
 					if features[0] == '\xc3\xb8': # ø
-						itemsets[-1].append(set([i for i in features]), free)
+						itemset.append(set([i for i in features]), free)
 					else:
-						itemsets[-1].append(set([int(i) for i in features]), free)
+						itemset.append(set([int(i) for i in features]), free)
 					continue
 
+				# The last itemset is complete
+				if itemset is not None: yield itemset
+
 				#
 				last = support
 				length = 0
-				supp = {class_:set() for class_ in classes}
+				supp = None if indexed else {class_:set() for class_ in classes}
 
 				#
-				for inst in row[0].split(","): # s,s,s
-					supp[train[inst]].add(inst)
-					length += 1
+				if indexed:
+					length = len(row[0].split(","))
+					builder.add([train.ids[inst] for inst in row[0].split(",")])
+				else:
+					for inst in row[0].split(","): # s,s,s
+						supp[train[inst]].add(inst)
+						length += 1
+
+					if orders is not None: orders.append(row[0].split(","))
 
 				if features[0] == '\xc3\xb8': # ø
-					itemsets.append(Itemset(len(itemsets), set([i for i in features]), supp, default=True))
+					itemset = Itemset(count, set([i for i in features]), supp, default=True)
 				else:
-					itemsets.append(Itemset(len(itemsets), set([int(i) for i in features]), supp, default=(length == len(train))))
+					itemset = Itemset(count, set([int(i) for i in features]), supp, default=(length == len(train)))
 
-				#
-				if itemsets[-1].isdefault(): has_default = True
+				count += 1
+
+		if itemset is not None: yield itemset
 			
 	# LCM
 	elif mode == "lcm":
 		# It needs to be mapped
-		map_ = [int(i) for i in train.keys()]
-		map_.sort()
-		map_ = [str(i) for i in map_] # it's preferable working w/ strings
-
-		# One itemset every two lines
-		itemset = None
+		if indexed:
+			map_ = sorted(train.keys(), key=lambda i: int(train.names[i]))
+		else:
+			map_ = [int(i) for i in train.keys()]
+			map_.sort()
+			map_ = [str(i) for i in map_] # it's preferable working w/ strings
 
 		# f f f f <new line> s s s s s s
-		with open(file, "r") as handler:
+		with lines_of(file) as handler:
 			for row in handler:
 				if itemset is None:
 					features = row.strip().split() # f f f f
@@ -105,33 +237,222 @@ def read_itemsets(file, train, classes, mode=None, free=False):
 						itemset = set([int(i) for i in features]) # Itemset features
 				else:
 					row = row.strip().split()
-					supp = {class_:set() for class_ in classes}
-					
-					for inst in row: # s s s s s
-						inst = map_[int(inst)]
- 						supp[train[inst]].add(inst)
+					if indexed:
+						supp = None
+						length = len(row)
+						builder.add([map_[int(inst)] for inst in row])
+					else:
+						supp = {class_:set() for class_ in classes}
+						row = [map_[int(inst)] for inst in row]
+						
+						for inst in row: # s s s s s
+							supp[train[inst]].add(inst)
+
+						if orders is not None: orders.append(row)
 
- 					length = sum(len(supp[class_]) for class_ in classes)
-					itemsets.append(Itemset(len(itemsets), itemset, supp, default=(len(itemset) == 0 or length == len(train))))					
+						length = sum(len(supp[class_]) for class_ in classes)
+
+					yield Itemset(count, itemset, supp, default=(len(itemset) == 0 or length == len(train)))
 					itemset = None # So it will read an itemset's row next time
+					count += 1
 
-					#
-					if itemsets[-1].isdefault(): has_default = True
+# Closed itemsets mined in process (core.miner) with a minimum support
+# size. The transactions are a training file (LUCS-KDD, whose rows are
+# numbered from 1 as the class files' keys) or (key, features) pairs.
+# Transactions out of the training set are left out
+def iter_mined_itemsets(file, train, classes, minimum=1, builder=None, orders=None):
+	indexed = builder is not None
+	keys = train.ids if indexed else train
 
-	# Forcing a default itemset
-	if not has_default:
-		supp = {class_:set() for class_ in classes}
-		for inst in train: supp[train[inst]].add(inst)
+	if isinstance(file, basestring):
+		with open_input(file) as handler:
+			transactions = [(str(nr), row.split()[:-1]) for nr, row in enumerate(handler, 1) if len(row.split()) > 0]
+	else: transactions = file
+
+	transactions = [(key, [int(f) for f in features]) for key, features in transactions if key in keys]
+	miner = ClosedMiner([features for key, features in transactions], minimum)
+
+	for count, (features, rows) in enumerate(miner):
+		if indexed:
+			supp = None
+			builder.add([train.ids[transactions[r][0]] for r in rows])
+		else:
+			supp = {class_:set() for class_ in classes}
+			for r in rows: supp[train[transactions[r][0]]].add(transactions[r][0])
+			if orders is not None: orders.append([transactions[r][0] for r in rows])
+
+		yield Itemset(count, set(int(f) for f in features), supp, default=(len(rows) == len(train)))
+
+# Itemsets of a large D-peeler/Multidupehack file (see iter_itemsets).
+# The file is split at line boundaries into byte ranges (settings.
+# PARSE_CHUNK) which are parsed by a process pool into compact arrays.
+# The chunks are merged in order, so rows with the same support as the
+# last one are appended to its itemset across chunk boundaries too
+def iter_chunked_itemsets(file, train, classes, free=False, builder=None, orders=None):
+	indexed = builder is not None
+
+	# Instances: support keys are parsed into positions
+	if indexed: names, positions = train.names, train.ids
+	else:
+		names = train.keys()
+		positions = {name: p for p, name in enumerate(names)}
+
+	# Byte ranges starting at line boundaries
+	bounds = [0]
+	with open(file, "rb") as handler:
+		size = os.fstat(handler.fileno()).st_size
+		while bounds[-1] < size:
+			handler.seek(min(size, bounds[-1] + settings.PARSE_CHUNK))
+			handler.readline()
+			bounds.append(min(size, max(handler.tell(), bounds[-1] + 1)))
+
+	# Chunk of rows: supports (positions, in the file's order), features
+	# (ø: empty pattern), whether each row has the support of the row
+	# before it and the first and last supports
+	def chunk(start, end):
+		sptr, sids, fptr, fpool, kinds, same = [0], [], [0], [], [], []
+		first = last = None
+
+		with open(file, "rb") as handler:
+			handler.seek(start)
+			for row in handler.read(end - start).splitlines():
+				# s,s,s f,f,f,f,f
+				row = row.strip().split()
+				support = row[0] # s,s,s
+				features = row[1].split(",") # f,f,f
+
+				same.append(support == last)
+				if first is None: first = support
+				last = support
+
+				sids.extend(positions[inst] for inst in support.split(","))
+				sptr.append(len(sids))
+
+				if features[0] == '\xc3\xb8': # ø
+					kinds.append(1)
+				else:
+					kinds.append(0)
+					fpool.extend(int(i) for i in features)
+
+				fptr.append(len(fpool))
+
+		return (numpy.array(sptr, dtype=numpy.int64), numpy.array(sids, dtype=numpy.int32),
+			numpy.array(fptr, dtype=numpy.int64), numpy.array(fpool, dtype=numpy.int64),
+			numpy.array(kinds, dtype=numpy.uint8), numpy.array(same, dtype=bool), first, last)
+
+	last = "@vauxgomes"
+	itemset = None
+	count = 0
+
+	with parallel.pimap(chunk, zip(bounds[:-1], bounds[1:])) as chunks:
+		for sptr, sids, fptr, fpool, kinds, same, first, end in chunks:
+			if first is not None: same[0] = (first == last)
+			if end is not None: last = end
+
+			sptr, fptr, kinds, same = sptr.tolist(), fptr.tolist(), kinds.tolist(), same.tolist()
+			for r in xrange(len(kinds)):
+				if kinds[r] == 1: features = set(['\xc3\xb8']) # ø
+				else: features = set(fpool[fptr[r]:fptr[r + 1]].tolist())
+
+				# Warning: assuming the supports are printed in order
+				if same[r] and not itemset.default:
+					itemset.append(features, free)
+					continue
+
+				# The last itemset is complete
+				if itemset is not None: yield itemset
+
+				#
+				ids = sids[sptr[r]:sptr[r + 1]].tolist()
+				supp = None
+
+				if indexed: builder.add(ids)
+				else:
+					# Keys in the file's order, as iter_itemsets adds them
+					keys = [names[inst] for inst in ids]
+					supp = {class_:set() for class_ in classes}
+
+					for inst in keys: supp[train[inst]].add(inst)
+					if orders is not None: orders.append(keys)
+
+				itemset = Itemset(count, features, supp, default=(kinds[r] == 1 or len(ids) == len(train)))
+				count += 1
+
+	if itemset is not None: yield itemset
+
+# Read itemsets from a binary file (see writer.write_itemsets)
+# Returns None if the file was written for another training set or
+# reader mode. Its arrays are mapped: in indexed mode the support index
+# is a view of the file unless the instances were read in another order
+def read_binary_itemsets(file, train, classes, mode=None, free=False):
+	with open(file, "rb") as handler:
+		if handler.read(len(ITEMSETS_MAGIC)) != ITEMSETS_MAGIC:
+			raise ValueError("Unknown itemsets file format: " + file)
+
+		header = json.loads(handler.read(struct.unpack("<Q", handler.read(8))[0]))
+		if header["hash"] != training_hash(train, classes) or header["mode"] != mode or header["free"] != free:
+			return None
+
+		start = handler.tell()
+		buffer = mmap.mmap(handler.fileno(), 0, access=mmap.ACCESS_READ)
+
+	arrays = {}
+	for name, dtype, shape, offset in header["arrays"]:
+		count = int(numpy.prod(shape))
+		arrays[name] = numpy.frombuffer(buffer, dtype=dtype, count=count, offset=start + offset).reshape(shape)
+
+	names = [name.encode("utf-8") for name in header["names"]]
+	indptr, indices, classptr = arrays["indptr"], arrays["indices"], arrays["classptr"]
+
+	# Supports
+	indexed = isinstance(train, Dataset)
+	if indexed:
+		if names == train.names: index = SupportIndex(train, indptr, indices, classptr, arrays["segments"])
+		else:
+			builder = SupportIndexBuilder(train)
+			for r in xrange(len(indptr) - 1): builder.add([train.ids[names[i]] for i in indices[indptr[r]:indptr[r + 1]]])
+
+			index = builder.build()
+
+	# Patterns
+	kinds, poolptr, pool = arrays["kinds"], arrays["poolptr"], arrays["pool"]
+	def pattern(p):
+		if kinds[p] == 1: return None
+		if kinds[p] == 2: return set(['\xc3\xb8']) # ø
+
+		return set(pool[poolptr[p]:poolptr[p + 1]].tolist())
+
+	# Itemsets
+	itemsets = []
+	patptr = arrays["patptr"]
+	order = sorted(classes)
+
+	for r, (id, default) in enumerate(zip(arrays["ids"].tolist(), arrays["defaults"].tolist())):
+		supp = None
+		if not indexed:
+			supp = {class_:set() for class_ in classes}
+
+			# Supports rebuilt in the order they were read, so that the sets
+			# iterate as the ones of read_itemsets
+			if "order" in arrays:
+				for i in arrays["order"][arrays["orderptr"][r]:arrays["orderptr"][r + 1]].tolist():
+					supp[train[names[i]]].add(names[i])
+			else:
+				for k, class_ in enumerate(order):
+					supp[class_].update(names[i] for i in indices[classptr[r, k]:classptr[r, k + 1]].tolist())
+
+		itemset = Itemset(id, pattern(patptr[r]), supp, default=bool(default))
+		for p in xrange(patptr[r] + 1, patptr[r + 1]): itemset.append(pattern(p))
+
+		if indexed: itemset.view(index, r)
+		itemsets.append(itemset)
 
-		itemsets.append(Itemset(-1, None, supp, default=True))
-	
-	# print "@ itemsets", len(itemsets)
 	return itemsets
 
 # Read sizes
 def read_sizes(file):
 	sizes = {}
-	with open(file, "r") as handler:
+	with open_input(file) as handler:
 		for row in handler:
 			# Class size
 			row = row.strip().split()
@@ -140,13 +461,59 @@ def read_sizes(file):
 	return sizes
 
 # Read Jaccard's indexes
-def read_jaccard(file):
+# If train is a Dataset the indexes are keyed by instance id
+def read_jaccard(file, train=None):
 	jaccard = {}
 
 	# ID Index
-	with open(file, "r") as handler:
+	with open_input(file) as handler:
 		for row in handler:
 			row = row.strip().split()
-			jaccard[row[0]] = float(row[1])
 
-	return jaccard
\ No newline at end of file
+			if isinstance(train, Dataset): jaccard[train.ids[row[0]]] = float(row[1])
+			else: jaccard[row[0]] = float(row[1])
+
+	return jaccard
+
+# Read trained models (see writer.write_models)
+# Returns the models (model, name, print_per_round, average), the default
+# class, the number of rounds and the Tmax (model, rounds) or None
+def read_models(file):
+	with open_input(file) as handler:
+		document = json.load(handler)
+
+	if document.get("format") != MODELS_FORMAT or document.get("version") != MODELS_VERSION:
+		raise ValueError("Unknown model file format: " + file)
+
+	return models_of(document)
+
+# Trained models of a JSON document (see writer.models_document)
+def models_of(document):
+
+	# Itemsets
+	itemsets = []
+	for default, patterns in document["itemsets"]:
+		patterns = [None if p is None else set(p) for p in patterns]
+		itemset = Itemset(len(itemsets), patterns[0], None, default=bool(default))
+		for pattern in patterns[1:]: itemset.append(pattern)
+
+		itemsets.append(itemset)
+
+	# Models
+	models = []
+	for entry in document["models"]:
+		model = []
+		for rule in entry["rules"]:
+			if len(rule) == 4: h = RuleClassifier(itemsets[rule[0]], rule[1], rule[2])
+			else: h = PartitionClassifier(itemsets[rule[0]], rule[1], rule[2], rule[4], rule[5])
+
+			model.append((h, rule[3]))
+
+		if entry["lac"]: model = CompiledLAC(model)
+		models.append((model, str(entry["name"]), entry["ppr"], entry["average"]))
+
+	# Tmax
+	tmax = document["tmax"]
+	if tmax is not None: tmax = (models[tmax["model"]][0], tmax["rounds"])
+
+	return models, document["default"], document["rounds"], tmax
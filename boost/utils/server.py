@@ -0,0 +1,89 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+'''
+
+Description
+-----------
+Resident server for jobs of the main module. Requests and answers are
+JSON documents, one per line (so asynchronous clients may keep several
+connections in flight):
+  request: {"id": ..., "args": [...], "input": "..."}
+  answer: {"id": ..., "ok": true, "output": "<inst_class> ~alg ..."}
+          {"id": ..., "ok": false, "error": "..."}
+
+'''
+
+# Imports
+import os
+import sys
+import json
+import signal
+import traceback
+import SocketServer
+
+# Answer line of a request line
+def answer(handler, line):
+	response = {}
+
+	try:
+		request = json.loads(line)
+		if "id" in request: response["id"] = request["id"]
+
+		response["output"] = handler(request)
+		response["ok"] = True
+
+	# Argument errors exit
+	except (Exception, SystemExit) as error:
+		sys.stderr.write(traceback.format_exc())
+
+		response["ok"] = False
+		response["error"] = "%s: %s" % (type(error).__name__, error)
+
+	return json.dumps(response) + "\n"
+
+# Serves requests read from a stream (stdin framing), one at a time
+def serve_stream(handler, instream=sys.stdin, outstream=sys.stdout):
+	for line in iter(instream.readline, ""):
+		if line.strip() == "": continue
+
+		outstream.write(answer(handler, line))
+		outstream.flush()
+
+# Connection handler: requests of a connection are served in order
+class JobHandler(SocketServer.StreamRequestHandler):
+
+	#
+	def handle(self):
+		for line in iter(self.rfile.readline, ""):
+			if line.strip() == "": continue
+
+			self.wfile.write(answer(self.server.handler, line))
+			self.wfile.flush()
+
+# Unix socket server: each connection is served by a forked process,
+# which inherits the loaded modules and settings
+class JobServer(SocketServer.ForkingMixIn, SocketServer.UnixStreamServer):
+
+	#
+	def __init__(self, path, handler):
+		SocketServer.UnixStreamServer.__init__(self, path, JobHandler)
+		self.handler = handler
+
+# Serves requests on a Unix socket until interrupted
+def serve_socket(handler, path):
+	if os.path.exists(path): os.unlink(path)
+	server = JobServer(path, handler)
+
+	# Terminating as if interrupted
+	def terminate(signum, frame): raise KeyboardInterrupt
+	signal.signal(signal.SIGTERM, terminate)
+
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
+		if os.path.exists(path): os.unlink(path)
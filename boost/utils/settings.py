@@ -10,3 +10,11 @@ MIN_CONF = 0.58
 
 GAMMA = 0.0
 kICV = 5 # Internal cross-validation folds
+
+TIE_TOLERANCE = 1e-9 # Relative tolerance for ties in the vectorized searches
+PROCESSES = None # Worker processes for parallel tasks (None: one per core)
+
+CACHE_MEMORY = 1 << 28 # Bytes of the lazy mode cache kept in memory
+CACHE_DISK = 1 << 30 # Bytes of the lazy mode cache kept on disk (with a directory)
+
+PARSE_CHUNK = 1 << 26 # Bytes per chunk of the itemsets files parsed in parallel
@@ -4,9 +4,14 @@
 
 # Imports
 import random
+import numpy
 
 # Local imports
 import settings
+import parallel
+from core.instance import Instance
+from core.coverage import coverage_of
+from core.compiledlac import CompiledLAC
 
 # Prediction function "model(x)"
 def prediction(model, test, print_per_round=False, average=False):
@@ -44,12 +49,184 @@ def prediction(model, test, print_per_round=False, average=False):
 
 	return pred
 
+# Batch prediction: model(x) for every test instance (or training key)
+# Returns an (instances x rounds) matrix holding what prediction() gives
+# for each instance, with None replaced by default. Scores accumulate in
+# arrays and ties are broken in the order the score dict would iterate.
+# Final sums are scored with an early exit (see exited; stats gets the
+# number of rules skipped)
+def predictions(model, tests, default=None, print_per_round=False, average=False, coverage=None, stats=None):
+	# Compiled LAC: final predictions of test instances
+	if isinstance(model, CompiledLAC):
+		if not print_per_round and len(tests) > 0 and isinstance(tests[0], Instance):
+			return model.predictions(tests, default, average)
+
+		model = model.model
+
+	n = len(tests)
+	T = len(model)
+
+	# Class columns of the model (code 0 stands for None)
+	classes = []
+	for h, alpha in model:
+		for class_, conf in h.outcomes():
+			if class_ is not None and class_ not in classes: classes.append(class_)
+
+	column = {class_: k for k, class_ in enumerate(classes)}
+	labels = numpy.array([default] + classes)
+	K = len(classes)
+
+	# Just for safety
+	if T == 0: return labels[numpy.zeros((n, 1), dtype=int)]
+
+	# Coverage source
+	if coverage is None: coverage = coverage_of(tests)
+
+	# Final sums: unless some instance has no sure leader
+	if not print_per_round and not average:
+		codes = exited(model, n, column, coverage, stats)
+		if codes is not None: return labels[codes[:, None]]
+
+	# Variables
+	score = numpy.zeros((n, K))
+	count = numpy.zeros((n, K))
+	codes = numpy.zeros((n, T if print_per_round else 1), dtype=int)
+
+	# Iteration order of the score dict: it only depends on the classes'
+	# insertion order, so it is kept per instance as the rank of each class
+	inserted = [() for i in xrange(n)]
+	rank = numpy.zeros((n, K), dtype=int)
+	orders = {}
+
+	def order(sequence):
+		if sequence not in orders:
+			keys = list({class_: None for class_ in sequence})
+			if average: keys = list({class_: None for class_ in keys}) # avgscr iterates count's keys
+
+			orders[sequence] = numpy.repeat(K, K)
+			for r, class_ in enumerate(keys): orders[sequence][column[class_]] = r
+
+		return orders[sequence]
+
+	# Each rule in model: (h, alpha)
+	for t, (h, alpha) in enumerate(model):
+		inside, outside = h.outcomes()
+		mask = coverage(h.itemset)
+
+		for (class_, conf), where in ((inside, mask), (outside, ~mask)):
+			if class_ is None: continue
+			k = column[class_]
+
+			# Class entering the dicts
+			for i in numpy.flatnonzero(where & (count[:, k] == 0)):
+				inserted[i] += (class_,)
+				rank[i] = order(inserted[i])
+
+			score[where, k] += conf * alpha
+			count[where, k] += 1.0
+
+		# Mostly LAC/EAC's case: the last round only
+		if not print_per_round and t < T - 1: continue
+
+		present = count > 0
+		if average:
+			with numpy.errstate(divide='ignore', invalid='ignore'): values = score / count
+		else: values = score
+
+		values = numpy.where(present, values, -numpy.inf)
+		best = values.max(axis=1) if K > 0 else numpy.zeros(n)
+		first = numpy.where(present & (values == best[:, None]), rank, K + 1).argmin(axis=1) if K > 0 else 0
+
+		codes[:, t if print_per_round else 0] = numpy.where(present.any(axis=1), first + 1, 0)
+
+	# Avoiding extra work when reading results
+	if print_per_round and T < settings.MAX_ROUNDS:
+		codes = numpy.hstack((codes, numpy.repeat(codes[:, -1:], settings.MAX_ROUNDS - T, axis=1)))
+
+	return labels[codes]
+
+# Final predictions of summed votes, as codes of predictions() (None if
+# some instance has no sure leader). Rules are added by decreasing
+# largest contribution and the sums stop once the rules left cannot
+# overturn any instance's leader: their gains and losses per class bound
+# the rivals' and the leader's final sums. Sums taken in another order
+# may round differently, so leaders must win by a margin
+def exited(model, n, column, coverage, stats=None):
+	T, K = len(model), len(column)
+	if stats is not None: stats["skipped"] = 0
+	if K == 0: return None
+
+	# Rules by decreasing largest contribution
+	def largest(rule):
+		h, alpha = rule
+		return max([abs(conf * alpha) for class_, conf in h.outcomes() if class_ is not None] or [0])
+
+	rules = sorted(model, key=largest, reverse=True)
+
+	# Contributions of the rules left after j rules, per class: gains,
+	# losses and whether any of them votes for it
+	highest = numpy.full((T + 1, K), -numpy.inf)
+	lowest = numpy.full((T + 1, K), numpy.inf)
+
+	for j, (h, alpha) in enumerate(rules):
+		for class_, conf in h.outcomes():
+			if class_ is None: continue
+			k = column[class_]
+
+			highest[j, k] = max(highest[j, k], conf * alpha)
+			lowest[j, k] = min(lowest[j, k], conf * alpha)
+
+	voting = numpy.isfinite(highest)
+	gain = numpy.cumsum(numpy.where(voting, numpy.maximum(0, highest), 0)[::-1], axis=0)[::-1]
+	loss = numpy.cumsum(numpy.where(voting, numpy.minimum(0, lowest), 0)[::-1], axis=0)[::-1]
+	left = numpy.logical_or.accumulate(voting[::-1], axis=0)[::-1]
+
+	margin = settings.TIE_TOLERANCE * (1.0 + numpy.abs(gain[0]).sum() + numpy.abs(loss[0]).sum())
+
+	# Sums and classes voted for
+	score = numpy.zeros((n, K))
+	present = numpy.zeros((n, K), dtype=bool)
+	at = numpy.arange(n)
+
+	for j, (h, alpha) in enumerate(rules[:-1]):
+		inside, outside = h.outcomes()
+		mask = coverage(h.itemset)
+
+		for (class_, conf), where in ((inside, mask), (outside, ~mask)):
+			if class_ is None: continue
+			k = column[class_]
+
+			score[where, k] += conf * alpha
+			present[where, k] = True
+
+		# Worst final sum of the leaders and best final sums of their rivals
+		leader = numpy.where(present, score, -numpy.inf).argmax(axis=1)
+		worst = score[at, leader] + loss[j + 1, leader]
+
+		rivals = numpy.where(present, score, numpy.where(left[j + 1], 0.0, -numpy.inf)) + gain[j + 1]
+		rivals[at, leader] = -numpy.inf
+
+		if (present.any(axis=1) & (worst > rivals.max(axis=1) + margin)).all():
+			if stats is not None: stats["skipped"] = T - j - 1
+			return leader + 1
+
+	return None
+
+# Positions of the values tied with the best one (vectorized searches)
+# Sums are not taken in the order of the dict-based loops, so ties are
+# detected within a relative tolerance. Rules whose sums differ only by
+# rounding are then tied here but not in the dict-based loops, which
+# keep the exact largest: from the first such round the models differ
+def ties(values, best):
+	return numpy.flatnonzero(values >= best - settings.TIE_TOLERANCE * abs(best)).tolist()
+
 # Internal cross-validation
-def internalcv(itemsets, train, classes, alg, weights=None, extra=None):
+# Folds are trained in parallel (see parallel.pmap) and their hits are
+# summed in fold order, as a sequential run would
+def internalcv(itemsets, train, classes, alg, weights=None, extra=None, processes=None):
 	# Safety
 	if len(train) < settings.kICV: return [0]*settings.MAX_ROUNDS
 
-	keys = train.keys()
 	acc = [0]*settings.MAX_ROUNDS
 	
 	# Weights
@@ -59,7 +236,8 @@ def internalcv(itemsets, train, classes, alg, weights=None, extra=None):
 	wsum = {class_: 0.0 for class_ in classes}
 	for i in train: wsum[train[i]] += weights[i]
 
-	for fold in stratified_wkfolds(train, classes, settings.kICV, weights):
+	# Hits of each round on each instance of a fold
+	def hits(fold):
 		weights_ = weights.copy()
 		wsum_ = {class_: wsum[class_] for class_ in classes}
 
@@ -71,25 +249,25 @@ def internalcv(itemsets, train, classes, alg, weights=None, extra=None):
 		# Defining default class
 		default_class = max(wsum_, key=wsum_.get)
 
-		#
+		# Same seed for every fold, wherever it runs
+		random.seed(settings.RANDOM_SEED)
 		alg_ = alg(itemsets, train, classes, settings.MAX_ROUNDS, weights_, extra)
 
 		# Safety
 		if len(alg_) > 0:
 			while len(alg_) < settings.MAX_ROUNDS: alg_.append(alg_[-1])
 		
-		#
-		for inst in fold:
-			pred = prediction(alg_, inst, True, False)
-
-			for j in xrange(len(pred)):
-				if pred[j] == train[inst]:
-					acc[j] += weights[inst]
-				elif pred[j] is None and train[inst] == default_class:
-					acc[j] += weights[inst]
-					
-		# Freeing some memory
-		del alg_
+		# Predictions (None stands for the default class)
+		pred = predictions(alg_, fold, default_class, True)
+		return (pred == numpy.array([train[inst] for inst in fold])[:, None]).tolist()
+
+	folds = stratified_wkfolds(train, classes, settings.kICV, weights)
+
+	# Merging
+	for fold, hits_ in zip(folds, parallel.pmap(hits, [(fold,) for fold in folds], processes)):
+		for inst, hit in zip(fold, hits_):
+			for j in xrange(len(hit)):
+				if hit[j]: acc[j] += weights[inst]
 
 	return acc
 
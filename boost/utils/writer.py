@@ -0,0 +1,188 @@
+# Author: Vaux Gomes
+# Contact: vauxgomes@gmail.com
+# Version: 0.1
+
+# Imports
+import os
+import gzip
+import json
+import struct
+import hashlib
+import tempfile
+
+import numpy
+
+# Local imports
+import settings
+from core.partitionclassifier import PartitionClassifier
+from core.compiledlac import CompiledLAC
+from core.dataset import Dataset
+from core.supportindex import SupportIndexBuilder
+
+# Model file format (see reader.read_models)
+MODELS_FORMAT = "boost-models"
+MODELS_VERSION = 1
+
+# Binary itemsets file format (see reader.read_binary_itemsets)
+ITEMSETS_MAGIC = "BOOSTIS\x01"
+ITEMSETS_ALIGN = 8
+
+# Write trained models: a JSON document (gzip'ed if the file ends in .gz)
+def write_models(file, models, default_class, tmax=None):
+	handler = gzip.open(file, "wb") if file.endswith(".gz") else open(file, "w")
+	with handler:
+		json.dump(models_document(models, default_class, tmax), handler, separators=(",", ":"))
+
+# JSON document of trained models
+#   itemsets: [default, [pattern, ...]] shared by the rules
+#   models: name, print_per_round, average, compiled LAC and rules
+#     [itemset, pred, conf, alpha] or [itemset, pred, conf, alpha, pred_, conf_]
+#   tmax: chosen rounds of a model (internal cross-validation)
+def models_document(models, default_class, tmax=None):
+	itemsets = []
+	position = {}
+
+	# Shared itemsets
+	def itemset_of(itemset):
+		if id(itemset) not in position:
+			position[id(itemset)] = len(itemsets)
+			patterns = [None if p is None else sorted(p) for p in itemset.patterns]
+			itemsets.append([1 if itemset.isdefault() else 0, patterns])
+
+		return position[id(itemset)]
+
+	# Rules
+	def rules_of(model):
+		rules = []
+		for h, alpha in model:
+			rule = [itemset_of(h.itemset), h.pred, h.conf, alpha]
+			if isinstance(h, PartitionClassifier): rule += [h.pred_, h.conf_]
+
+			rules.append(rule)
+
+		return rules
+
+	document = {
+		"format": MODELS_FORMAT,
+		"version": MODELS_VERSION,
+		"default": default_class,
+		"rounds": settings.MAX_ROUNDS,
+		"models": [],
+		"tmax": None}
+
+	for model, name, ppr, average in models:
+		compiled = isinstance(model, CompiledLAC)
+		document["models"].append({
+			"name": name,
+			"ppr": ppr,
+			"average": average,
+			"lac": compiled,
+			"rules": rules_of(model.model if compiled else model)})
+
+	# Tmax: position of the model among the others
+	if tmax is not None:
+		model, rounds = tmax
+		k = next(k for k, (m, name, ppr, average) in enumerate(models) if m is model)
+		document["tmax"] = {"model": k, "rounds": rounds}
+
+	document["itemsets"] = itemsets
+
+	return document
+
+# Digest of a training set: its (key, class) pairs and classes
+def training_hash(train, classes):
+	if isinstance(train, Dataset): pairs = [(train.names[i], train[i]) for i in train]
+	else: pairs = train.items()
+
+	return hashlib.sha1(repr((sorted(pairs), sorted(classes)))).hexdigest()
+
+# Write itemsets into a binary file: a JSON header followed by aligned
+# arrays, so that they can be mapped (see reader.read_binary_itemsets)
+#   header: training set hash, reader mode, instance keys and arrays
+#   itemsets: ids, default flags and pattern pointers
+#   patterns: kinds (0: features, 1: None, 2: empty), pool pointers and pool
+#   supports: rows of instance positions sorted by class and then by
+#     position, with class offsets and row-class segments (SupportIndex)
+#   orders: in dict mode, the rows' positions in the order they were read
+#     (orders of reader.read_itemsets), if they are given
+def write_itemsets(file, itemsets, train, classes, mode=None, free=False, orders=None):
+	# Instances: the index's dataset or the keys in their numeric order
+	indexed = isinstance(train, Dataset)
+	if indexed: dataset = train
+	else:
+		names = sorted(train.keys(), key=lambda key: (int(key) if key.isdigit() else key))
+		dataset = Dataset(names, [train[name] for name in names], classes)
+
+	# Supports: the index itemsets are views of, if they are all its rows in order
+	index = itemsets[0].index if len(itemsets) > 0 else None
+	if not (indexed and index is not None and all(it.index is index for it in itemsets)
+		and [it.row for it in itemsets] == range(len(index))):
+		builder = SupportIndexBuilder(dataset)
+		for it in itemsets:
+			ids = [i for class_ in it.supp for i in it.supp[class_]]
+			builder.add(ids if indexed else [dataset.ids[i] for i in ids])
+
+		index = builder.build()
+
+	# Patterns
+	kinds, poolptr, pool, patptr = [], [0], [], [0]
+	for it in itemsets:
+		for pattern in it.patterns:
+			if pattern is None: kinds.append(1)
+			elif any(isinstance(f, basestring) for f in pattern): kinds.append(2)
+			else:
+				kinds.append(0)
+				pool.extend(sorted(pattern))
+
+			poolptr.append(len(pool))
+
+		patptr.append(len(kinds))
+
+	arrays = [
+		("ids", numpy.array([it.id for it in itemsets], dtype=numpy.int64)),
+		("defaults", numpy.array([it.isdefault() for it in itemsets], dtype=numpy.uint8)),
+		("patptr", numpy.array(patptr, dtype=numpy.int64)),
+		("kinds", numpy.array(kinds, dtype=numpy.uint8)),
+		("poolptr", numpy.array(poolptr, dtype=numpy.int64)),
+		("pool", numpy.array(pool, dtype=numpy.int64)),
+		("indptr", numpy.asarray(index.indptr, dtype=numpy.int64)),
+		("indices", numpy.asarray(index.indices, dtype=numpy.int32)),
+		("classptr", numpy.asarray(index.classptr, dtype=numpy.int64)),
+		("segments", numpy.asarray(index.segments, dtype=numpy.int64))]
+
+	if not indexed and orders is not None:
+		arrays.append(("orderptr", numpy.cumsum([0] + [len(keys) for keys in orders], dtype=numpy.int64)))
+		arrays.append(("order", numpy.array([dataset.ids[key] for keys in orders for key in keys], dtype=numpy.int32)))
+
+	# Header: arrays at aligned offsets after it
+	header = {
+		"hash": training_hash(train, classes),
+		"mode": mode,
+		"free": free,
+		"classes": dataset.classes,
+		"names": dataset.names,
+		"arrays": []}
+
+	offset = 0
+	for name, values in arrays:
+		header["arrays"].append([name, values.dtype.str, list(values.shape), offset])
+		offset += -(-values.nbytes // ITEMSETS_ALIGN) * ITEMSETS_ALIGN
+
+	header = json.dumps(header, separators=(",", ":"))
+	header += " " * (-(len(ITEMSETS_MAGIC) + 8 + len(header)) % ITEMSETS_ALIGN)
+
+	# Written aside and renamed: readers never see partial files
+	handle, temporary = tempfile.mkstemp(prefix=".", dir=os.path.dirname(os.path.abspath(file)))
+	with os.fdopen(handle, "wb") as handler:
+		handler.write(ITEMSETS_MAGIC + struct.pack("<Q", len(header)) + header)
+
+		for name, values in arrays:
+			handler.write(values.tostring())
+			handler.write("\0" * (-values.nbytes % ITEMSETS_ALIGN))
+
+	# Permissions of an ordinary file (mkstemp's are private)
+	umask = os.umask(0)
+	os.umask(umask)
+	os.chmod(temporary, 0666 & ~umask)
+
+	os.rename(temporary, file)
@@ -24,7 +24,7 @@ function show_help {
 cat << EOF
 Version: 0.1
 
-Usage: [-hemZADCS] [-s FILES] [-t FILES] [-b NUM] [-p ARGS]
+Usage: [-hemlngZADCSd] [-s FILES] [-t FILES] [-b NUM] [-k DIR] [-p ARGS]
 Arguments:
  -h 	Displays help
  -s 	Training Files (Required)
@@ -32,6 +32,8 @@ Arguments:
  -z 	MINER:   Minimum support size (default: 1)
  -m 	MINER:   Use Multidupehack to mine the itemsets (default: D-peeler)
  -l 	MINER:   Use LCM to mine the itemsets (default: D-peeler)
+ -n 	MINER:   Use the native miner, in process (default: D-peeler)
+ -g 	MINER:   Lazy mode mines the training set once (default: once per test)
  -e 	BOOSTER: Activates Eager Mode
  -Z 	BOOSTER: Deactivates ZERO classifier
  -A 	BOOSTER: Deactivates Associative Classifier
@@ -43,6 +45,8 @@ Arguments:
  -j 	BOOSTER: Activates use of Jaccard\'s index
  -b 	BOOSTER: Maximum number of rounds
  -f 	BOOSTER: Uses only free itemsets
+ -k 	BOOSTER: Eager mode keeps the mined itemsets in this directory
+ -d 	BOOSTER: Eager mode served by a resident booster
 
 NOTE: This code works only for luccskdd files.
 EOF
@@ -55,6 +59,16 @@ function cerr {
 	echo -e "\033[95m$1\033[0m" 1>&2
 }
 
+# Streams a file, decompressing gzip, bz2 and xz files
+function inflate {
+	case $1 in
+	*.gz) gzip -dc $1 ;;
+	*.bz2) bzip2 -dc $1 ;;
+	*.xz|*.lzma) xz -dc $1 ;;
+	*) cat $1 ;;
+	esac
+}
+
 # Header of the files
 function header {
 	echo -n "# Mode: "
@@ -64,6 +78,7 @@ function header {
 	echo -n "# Miner: "
 	if $4; then echo "Multidupehack"
 	elif $5; then echo "Lcm"
+	elif $6; then echo "Native"
 	else echo "D-peeler"; fi
 
 	echo "# Train:" ${1##*/}
@@ -83,6 +98,8 @@ if [ -z "$1" ]; then show_help; fi
 e=false # Eager mode (false = Lazy)
 m=false # Multidupehack switch (false = D-peeler)
 l=false # LCM switch (false = D-peeler)
+n=false # Native miner switch (false = D-peeler)
+g=false # Global mining in the lazy mode
 
 Z=true # ZERO classifier
 A=true # Associative classifier {LAC, EAC}
@@ -94,12 +111,13 @@ c=false
 o=false # Sizes
 j=false # Jaccard's index
 f=false # Free itemsets
+d=false # Resident booster
 
-# Minimum support size for D-peeler / Multidupehack
+# Minimum support size for D-peeler / Multidupehack / Native miner
 MSIZE=1
 
 # Parsing options
-while getopts ":hs:t:z:mleZADCScojb:f" opt
+while getopts ":hs:t:z:mlngeZADCScojb:fk:d" opt
 do
 	case $opt in
 	h) show_help ;;
@@ -118,6 +136,8 @@ do
 	z) MSIZE=$OPTARG ;;
 	m) m=true ;;
 	l) l=true ;;
+	n) n=true ;;
+	g) g=true ;;
 	e) e=true ;;
 	Z) Z=false ;;
 	A) A=false ;;
@@ -129,6 +149,8 @@ do
 	j) j=true ;;
 	b) b=$OPTARG ;;
 	f) f=true ;;
+	k) k=$OPTARG ;;
+	d) d=true ;;
 	
 	:)
 		cerr "Option -$OPTARG requires an argument." >&2
@@ -183,144 +205,106 @@ if $f; then BOPTIONS+=" --free";fi
 TMP=`mktemp -t runner.sh.XXXXXX`
 trap "rm $TMP* 2>/dev/null" 0
 
-# Jaccard's index
-if $j; then
-	BOPTIONS+=" -j $TMP.jc"; 
-	jaccard="use jaccard" # Just an unempty string
+# Booster: a new process per fold or a resident one (eager mode). The
+# lazy mode already trains every test instance in a single process
+BOOSTER="./boost/main.py"
+if $d && $e
+then
+	SOCKET=`mktemp -u -t runner.sh.sock.XXXXXX`
+	./boost/main.py --serve $SOCKET &
+	SERVER=$!
+	trap "kill $SERVER 2>/dev/null; rm $TMP* 2>/dev/null" 0
+
+	# Waiting for the socket
+	while [ ! -S $SOCKET ]
+	do
+		if ! kill -0 $SERVER 2>/dev/null; then cerr "Booster server failed"; exit 1; fi
+		sleep 0.1
+	done
+
+	BOOSTER="./boost/client.py $SOCKET"
 fi
 
-# Variable for awk projection, if necessary
-if $m; then form="use multidupehack"; fi # Just an unempty string
+# Lazy mode options: miner and projection
+LOPTIONS="-z $MSIZE"
+if $m; then LOPTIONS+=" -m"; fi
+if $l; then LOPTIONS+=" -l"; fi
+if $n; then LOPTIONS+=" -n"; fi
+if $g; then LOPTIONS+=" -g"; fi
+if $o; then LOPTIONS+=" -o"; fi
+if $j; then LOPTIONS+=" -j"; fi
 
 # Learning Stage
 length=${#TRAIN[@]}
 for ((i = 0; i < length; i++))
 do
 	# Printing header
-	header ${TRAIN[i]} ${TEST[i]} $e $m $l
+	header ${TRAIN[i]} ${TEST[i]} $e $m $l $n
 
 	# Eager Mode
 	if $e
 	then
 		# Creating class files
-		awk -v prefix=$TMP '{print NR >> prefix ".class." $NF}' ${TRAIN[i]}
+		inflate ${TRAIN[i]} | awk -v prefix=$TMP '{print NR >> prefix ".class." $NF}'
+
+		# Reader mode of the miner's output. The native miner's input is the
+		# training file, so it is also given to a run on cached itemsets
+		if $m; then RMODE=""
+		elif $l; then RMODE="--rmode lcm"
+		elif $n; then RMODE="--rmode native -z $MSIZE -i ${TRAIN[i]}"
+		else RMODE=""; fi
+
+		# Binary itemsets of the fold, mined by an earlier run (see main.py
+		# --icache). Training files are told apart by their full paths
+		ICACHE=""
+		if [ -n "$k" ]
+		then
+			ICACHE=`readlink -f ${TRAIN[i]} | cksum | cut -d " " -f 1`
+			ICACHE="$k/${TRAIN[i]##*/}.$ICACHE.$MSIZE"
+			if $m; then ICACHE+=".multidupehack"
+			elif $l; then ICACHE+=".lcm"
+			elif $n; then ICACHE+=".native"
+			else ICACHE+=".d-peeler"; fi
+			if $f; then ICACHE+=".free"; fi
+
+			ICACHE+=".bin"
+		fi
 
 		# Preparing train file + Running miner + Calling booster
-		if $m
+		if [ -n "$ICACHE" ] && [ -f $ICACHE ] && \
+			$BOOSTER -s $TMP.class* -t ${TEST[i]} --icache $ICACHE $RMODE $BOPTIONS 2> $TMP.err
+		then
+			# Cached itemsets (a stale cache fails and is mined again below)
+			cat $TMP.err 1>&2
+		elif $m
 		then
 			# multidupehack
-			awk 'BEGIN { OFS = "," } { --NF; print NR " " $0 " " 1 }' ${TRAIN[i]} | \
+			inflate ${TRAIN[i]} | awk 'BEGIN { OFS = "," } { --NF; print NR " " $0 " " 1 }' | \
 			multidupehack -u 1 -s "$MSIZE 0" /dev/stdin -o /dev/stdout | \
-			./boost/main.py -s $TMP.class* -t ${TEST[i]} -i /dev/stdin $BOPTIONS || break
+			$BOOSTER -s $TMP.class* -t ${TEST[i]} -i /dev/stdin ${ICACHE:+--icache $ICACHE} $BOPTIONS || break
 		elif $l
 		then
-			# lcm
-			awk 'BEGIN { OFS = "," } { --NF; print NR " " $0 }' ${TRAIN[i]} | \
-			lcm IF_ ${TRAIN[i]} 1 - 2> /dev/null 
+			# lcm: it reads its input more than once, from a file
+			inflate ${TRAIN[i]} | awk 'BEGIN { OFS = "," } { --NF; print }' > $TMP.lcm
+			lcm IC_ $TMP.lcm $MSIZE - 2> /dev/null | \
+			$BOOSTER -s $TMP.class* -t ${TEST[i]} -i /dev/stdin $RMODE ${ICACHE:+--icache $ICACHE} $BOPTIONS || break
+		elif $n
+		then
+			# Native miner: the booster mines the training file
+			$BOOSTER -s $TMP.class* -t ${TEST[i]} $RMODE ${ICACHE:+--icache $ICACHE} $BOPTIONS || break
 		else
 			# d-peeler
-			awk 'BEGIN { OFS = "," } { --NF; print NR " " $0 }' ${TRAIN[i]} | \
+			inflate ${TRAIN[i]} | awk 'BEGIN { OFS = "," } { --NF; print NR " " $0 }' | \
 			d-peeler -s "$MSIZE 0" /dev/stdin -o /dev/stdout | \
-			./boost/main.py -s $TMP.class* -t ${TEST[i]} -i /dev/stdin $BOPTIONS || break
+			$BOOSTER -s $TMP.class* -t ${TEST[i]} -i /dev/stdin ${ICACHE:+--icache $ICACHE} $BOPTIONS || break
 		fi
 
 		# Deleting remanescent files
 		rm $TMP*
 	# Lazy Mode 
 	else
-		# Train sizes
-		if $o; then
-			SIZES=`mktemp -t runner.sh.XXXXXX`
-			trap "rm $SIZE 2>/dev/null" 0
-
-			awk '{++size[$NF]}END{for (i in size) { print i, size[i]}}' ${TRAIN[i]} > $SIZES
-			BOPTIONS+=" -o $SIZES"
-		fi
-		
-		row=0 # Row for deletion
-		while read -r example
-		do
-			# Row for deletion from projection
-			row=$((row + 1))
-
-			# Wrinting the test file
-			echo $example > $TMP.testset
-
-			# Features to project
-			fts=`expr "$example" : '\(.*\) .*'`
-
-			# Preparing projected train + Creating the class files
-			sed $((row))d ${TRAIN[i]} | awk -v prefix=$TMP -v object="$fts" -v form="$form" -v jaccard="$jaccard" '
-			BEGIN {
-				n = split(object, tmp);
-				for (i = 1; i <= n; ++i)
-					attributes[tmp[i]] = ""
-			}{
-				empty = "t";
-				intersection = 0
-
-				#
-				for (i = 1; i != NF; ++i) {
-					if ($i in attributes) {
-						if (empty == "")
-							printf "," $i >> prefix;
-						else {
-							empty = "";
-							printf NR " " $i >> prefix
-						}
-
-						intersection++
-					}
-				};
-
-				if (empty == "") {
-					# For multidupehack
-					if (form) { 
-						# If FORM is a non-empty string AWK understands it as true value
-						# And so it prints the projection in the multidupehack format
-
-						print " 1" >> prefix;
-		                print "0 " NR >> prefix ".class." $NF
-
-		            # For d-peeler
-					} else {
-						print "" >> prefix;
-						print NR >> prefix ".class." $NF
-					}
-
-					# Jaccard
-					if (jaccard) {
-						union = n + NF - intersection - 1 # Class counts in NF
-						print NR " " intersection/union >> prefix ".jc"
-					}
-
-				}
-			}'
-
-			# Safety: Avoiding empty projection
-			if [ ! -s $TMP ]; then continue; fi
-
-			# Running Miner and + Calling booster
-			if $m
-			then
-				# multidupehack
-				multidupehack -s '$MSIZE 0' -u 1 -o /dev/stdout $TMP | \
-				./boost/main.py -s $TMP.class* -t $TMP.testset -i /dev/stdin $BOPTIONS || break
-			elif $l
-			then
-				# lcm
-				cut -f 2 -d " " $TMP > $TMP.lcm; lcm IC_ $TMP.lcm 0 - 2> /dev/null | \
-				./boost/main.py -s $TMP.class* -t $TMP.testset -i /dev/stdin $BOPTIONS --rmode lcm || break
-			else
-				# d-peeler
-				d-peeler -s "$MSIZE 0" -o /dev/stdout $TMP 2> /dev/null | \
-				./boost/main.py -s $TMP.class* -t $TMP.testset -i /dev/stdin $BOPTIONS || break
-			fi
-
-			# Deleting remanescent files
-			rm $TMP*
-			# exit 1
-		done < ${TEST[i]}
+		# Projections, mining and boosting in a single process
+		./boost/lazy.py -s ${TRAIN[i]} -t ${TEST[i]} $LOPTIONS $BOPTIONS || break
 	fi
 
 	# Printing footer
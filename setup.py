@@ -10,5 +10,6 @@ setup(
 	description="Implamentation of many different boosting algorithm",
 	author="Vaux Gomes",
 	author_email="vauxsgomes@gmail.com",
-	packages=['boost']
+	packages=['boost'],
+	install_requires=['numpy']
 )
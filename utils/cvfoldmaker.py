@@ -4,10 +4,15 @@
 # Contact: vauxgomes@gmail.com
 
 import os
+import sys
 import argparse
 import numpy
 from sklearn.cross_validation import StratifiedKFold
 
+# Compressed files are opened by the booster's reader (boost/utils/reader.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "boost"))
+from utils.reader import compression, open_input
+
 def arg_parsing():
 	# Argument Parsing
 	parser = argparse.ArgumentParser(description="Cross Validation Fold Maker")
@@ -28,7 +33,8 @@ def fold(file, k):
 
 
 	file = file[file.rfind("/") + 1:]
-	output_folder = directory + file + ".CV/"
+	name = os.path.splitext(file)[0] if compression(file) is not None else file
+	output_folder = directory + name + ".CV/"
 	
 	if not os.path.exists(output_folder):
 		os.makedirs(output_folder)
@@ -38,7 +44,7 @@ def fold(file, k):
 	X = []
 	Y = []
 
-	handler = open(directory + file, "r")
+	handler = open_input(directory + file)
 	for row in handler:
 		row = row.strip()
 		index = row.rfind(" ")
@@ -57,7 +63,7 @@ def fold(file, k):
 	for train_index, test_index in skf:
 		fold += 1
 
-		f = output_folder + file + ".train-" + str(fold)
+		f = output_folder + name + ".train-" + str(fold)
 		print f
 		
 		handler = open(f, "w")
@@ -65,7 +71,7 @@ def fold(file, k):
 			handler.write(" ".join(X[i]) + " " + Y[i] + "\n")
 		handler.close()
 
-		f = output_folder + file + ".test-" + str(fold)
+		f = output_folder + name + ".test-" + str(fold)
 		print f
 
 		handler = open(f, "w")